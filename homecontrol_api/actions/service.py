@@ -1,3 +1,5 @@
+from typing import Callable
+
 from homecontrol_base.exceptions import DatabaseDuplicateEntryFoundError
 from homecontrol_base.hue.api.schema import Recall, ScenePut
 from homecontrol_base.service.homecontrol_base import HomeControlBaseService
@@ -20,9 +22,9 @@ class ActionService(BaseAPIService[HomeControlAPIDatabaseConnection]):
     def __init__(
         self,
         db_conn: HomeControlAPIDatabaseConnection,
-        base_service: HomeControlBaseService,
+        get_base_service: Callable[[], HomeControlBaseService],
     ) -> None:
-        super().__init__(db_conn, base_service)
+        super().__init__(db_conn, get_base_service)
 
     async def create_room_action(self, action_info: RoomActionPost) -> RoomAction:
         """Creates a room action
@@ -42,20 +44,20 @@ class ActionService(BaseAPIService[HomeControlAPIDatabaseConnection]):
 
         # Add to the database
         try:
-            action = self.db_conn.room_actions.create(action)
+            action = await self.db_conn.room_actions.create(action)
         except DatabaseDuplicateEntryFoundError as exc:
             raise NameAlreadyExistsError(str(exc)) from exc
 
         # Return the created room
         return RoomAction.model_validate(action)
 
-    def get_room_action(self, action_id: str) -> RoomAction:
+    async def get_room_action(self, action_id: str) -> RoomAction:
         """Returns a room action given its id"""
         return RoomAction.model_validate(
-            self.db_conn.room_actions.get(action_id=action_id)
+            await self.db_conn.room_actions.get(action_id=action_id)
         )
 
-    def update_room_action(
+    async def update_room_action(
         self, action_id: str, action_data: RoomActionPatch
     ) -> RoomAction:
         """Updates a room action
@@ -66,7 +68,7 @@ class ActionService(BaseAPIService[HomeControlAPIDatabaseConnection]):
         """
 
         # Obtain the room action
-        action = self.db_conn.room_actions.get(action_id)
+        action = await self.db_conn.room_actions.get(action_id)
 
         # Assign the new data
         update_data = action_data.model_dump(exclude_unset=True)
@@ -74,7 +76,7 @@ class ActionService(BaseAPIService[HomeControlAPIDatabaseConnection]):
             setattr(action, key, value)
 
         # Update and return the updated data
-        self.db_conn.room_actions.update(action)
+        await self.db_conn.room_actions.update(action)
         return RoomAction.model_validate(action)
 
     async def execute_room_action(self, action_id: str) -> None:
@@ -85,7 +87,7 @@ class ActionService(BaseAPIService[HomeControlAPIDatabaseConnection]):
         """
 
         # Action to perform
-        action = self.get_room_action(action_id=action_id)
+        action = await self.get_room_action(action_id=action_id)
 
         # Execute each task in order
         for task in action.tasks:
@@ -106,10 +108,10 @@ class ActionService(BaseAPIService[HomeControlAPIDatabaseConnection]):
                         task.scene_id, ScenePut(recall=Recall(action="active"))
                     )
 
-    def delete_room_action(self, action_id: str) -> None:
+    async def delete_room_action(self, action_id: str) -> None:
         """Deletes a room action
 
         Args:
             action_id (str): ID of the room action to delete
         """
-        self.db_conn.room_actions.delete(action_id=action_id)
+        await self.db_conn.room_actions.delete(action_id=action_id)
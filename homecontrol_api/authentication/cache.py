@@ -0,0 +1,128 @@
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from homecontrol_api.authentication.schemas import User, UserSession
+
+
+@dataclass(frozen=True)
+class CachedSession:
+    """A verified user session along with the user it belongs to"""
+
+    user: User
+    user_session: UserSession
+    # Time (seconds since the epoch) the access token expires
+    expiry: float
+
+
+class VerifiedSessionCache:
+    """In-process cache of verified user sessions keyed by access token
+
+    Entries are only kept until the access token they were verified with
+    expires, so a cached lookup can never outlive the token itself. Anything
+    that invalidates a session or changes a user should evict the relevant
+    entries.
+
+    Every eviction increments a generation number. Lookups record it before
+    reading from the database and pass it when adding the result, so that
+    a lookup that was in flight during an eviction can't add back what was
+    just evicted.
+    """
+
+    _entries: dict[str, CachedSession]
+    _max_entries: int
+    _generation: int
+    _lock: Lock
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self._entries = {}
+        self._max_entries = max_entries
+        self._generation = 0
+        self._lock = Lock()
+
+    def get_generation(self) -> int:
+        """Returns the current generation (to pass to add)"""
+        with self._lock:
+            return self._generation
+
+    def get(self, access_token: str) -> Optional[CachedSession]:
+        """Returns the cached session for an access token (if present and
+        not yet expired)"""
+        with self._lock:
+            entry = self._entries.get(access_token)
+            if entry is None:
+                return None
+            if entry.expiry <= time.time():
+                del self._entries[access_token]
+                return None
+            return entry
+
+    def add(
+        self,
+        access_token: str,
+        user: User,
+        user_session: UserSession,
+        expiry: float,
+        generation: int,
+    ) -> None:
+        """Adds a verified session to the cache (unless anything has been
+        evicted since it was read)
+
+        Args:
+            access_token (str): Access token the session was verified with
+            user (User): User the session belongs to
+            user_session (UserSession): The verified session
+            expiry (float): Time (seconds since the epoch) the access token
+                            expires
+            generation (int): Generation (from get_generation) before the
+                              session was read
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            if len(self._entries) >= self._max_entries:
+                self._remove_expired()
+                # Still full, so drop the oldest entries
+                while len(self._entries) >= self._max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[access_token] = CachedSession(
+                user=user, user_session=user_session, expiry=expiry
+            )
+
+    def evict_session(self, user_session_id: str) -> None:
+        """Removes any entries for a given user session"""
+        with self._lock:
+            self._generation += 1
+            self._remove_where(
+                lambda entry: entry.user_session.id == str(user_session_id)
+            )
+
+    def evict_user(self, user_id: str) -> None:
+        """Removes any entries for sessions belonging to a given user"""
+        with self._lock:
+            self._generation += 1
+            self._remove_where(lambda entry: entry.user.id == str(user_id))
+
+    def clear(self) -> None:
+        """Removes all entries"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def _remove_expired(self) -> None:
+        """Removes all entries whose access token has expired (lock must be
+        held)"""
+        now = time.time()
+        self._remove_where(lambda entry: entry.expiry <= now)
+
+    def _remove_where(self, predicate) -> None:
+        """Removes all entries matching a predicate (lock must be held)"""
+        for access_token in [
+            token for token, entry in self._entries.items() if predicate(entry)
+        ]:
+            del self._entries[access_token]
+
+
+# Shared by all requests handled by this process
+verified_session_cache = VerifiedSessionCache()
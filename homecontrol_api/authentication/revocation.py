@@ -0,0 +1,101 @@
+import time
+from threading import Lock
+
+
+class AccessTokenRevocationList:
+    """In-process record of revoked access tokens used when access tokens are
+    verified without touching the database
+
+    Sessions and individual access tokens are denied until any access token
+    issued for them would have expired anyway. Users have a version number
+    that is embedded in their access tokens and incremented whenever their
+    account changes, invalidating every access token issued before.
+
+    As this is only held in memory it can only vouch for tokens issued after
+    it was created (see covers).
+    """
+
+    _created_at: float
+    _user_versions: dict[str, int]
+    _revoked_sessions: dict[str, float]
+    _revoked_tokens: dict[str, float]
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._created_at = time.time()
+        self._user_versions = {}
+        self._revoked_sessions = {}
+        self._revoked_tokens = {}
+        self._lock = Lock()
+
+    def covers(self, issued_at: float) -> bool:
+        """Returns whether a token issued at a given time (seconds since the
+        epoch) was issued while this list has been recording revocations"""
+        return issued_at >= self._created_at
+
+    def get_user_version(self, user_id: str) -> int:
+        """Returns the current version of a user"""
+        with self._lock:
+            return self._user_versions.get(str(user_id), 0)
+
+    def revoke_user(self, user_id: str) -> None:
+        """Revokes all access tokens issued for a user so far"""
+        with self._lock:
+            self._user_versions[str(user_id)] = (
+                self._user_versions.get(str(user_id), 0) + 1
+            )
+
+    def revoke_session(self, user_session_id: str, until: float) -> None:
+        """Revokes all access tokens issued for a session
+
+        Args:
+            user_session_id (str): ID of the session
+            until (float): Time (seconds since the epoch) after which any
+                           access token issued for the session will have
+                           expired
+        """
+        with self._lock:
+            self._remove_expired()
+            self._revoked_sessions[str(user_session_id)] = until
+
+    def revoke_token(self, access_token: str, until: float) -> None:
+        """Revokes a single access token
+
+        Args:
+            access_token (str): Access token to revoke
+            until (float): Time (seconds since the epoch) the access token
+                           expires
+        """
+        with self._lock:
+            self._remove_expired()
+            self._revoked_tokens[access_token] = until
+
+    def is_revoked(
+        self, access_token: str, user_session_id: str, user_id: str, version: int
+    ) -> bool:
+        """Returns whether an access token has been revoked
+
+        Args:
+            access_token (str): The access token
+            user_session_id (str): ID of the session the token was issued for
+            user_id (str): ID of the user the token was issued for
+            version (int): Version of the user when the token was issued
+        """
+        with self._lock:
+            return (
+                access_token in self._revoked_tokens
+                or str(user_session_id) in self._revoked_sessions
+                or self._user_versions.get(str(user_id), 0) != version
+            )
+
+    def _remove_expired(self) -> None:
+        """Removes revoked sessions and tokens that can no longer be used
+        anyway (lock must be held)"""
+        now = time.time()
+        for revoked in (self._revoked_sessions, self._revoked_tokens):
+            for key in [key for key, until in revoked.items() if until <= now]:
+                del revoked[key]
+
+
+# Shared by all requests handled by this process
+access_token_revocations = AccessTokenRevocationList()
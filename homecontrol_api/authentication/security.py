@@ -1,5 +1,9 @@
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Optional
 
 import bcrypt
 import jwt
@@ -7,9 +11,77 @@ import jwt
 from homecontrol_api.exceptions import AuthenticationError
 
 
+# Cost factor used when not calibrated (bcrypt's default)
+DEFAULT_PASSWORD_HASHING_ROUNDS = 12
+
+# Range of cost factors calibration may choose (on slow machines it may go
+# below the default, but never below 10, OWASP's minimum for bcrypt, up to
+# bcrypt's maximum)
+MIN_PASSWORD_HASHING_ROUNDS = 10
+MAX_PASSWORD_HASHING_ROUNDS = 31
+
+# Cost factor to use when hashing new passwords
+_password_hashing_rounds = DEFAULT_PASSWORD_HASHING_ROUNDS
+
+
+def calibrate_password_hashing(target_time: float) -> int:
+    """Picks the cost factor used for hashing passwords based on how long
+    hashing takes on this machine
+
+    Args:
+        target_time (float): Time in seconds hashing a password should take.
+                             The largest cost factor that doesn't exceed
+                             this is chosen (but never less than
+                             MIN_PASSWORD_HASHING_ROUNDS).
+
+    Returns:
+        int: The chosen cost factor
+
+    Raises:
+        ValueError: If the target time isn't positive
+    """
+    global _password_hashing_rounds
+
+    if target_time <= 0:
+        raise ValueError(
+            f"Password hashing target time must be positive, got {target_time}"
+        )
+
+    # Each additional round doubles the time taken, so time one hash at a
+    # cheap cost factor and extrapolate (taking the best of a few to reduce
+    # noise)
+    base_rounds = 8
+    salt = bcrypt.gensalt(rounds=base_rounds)
+    base_time = math.inf
+    for _ in range(3):
+        start_time = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        base_time = min(base_time, time.perf_counter() - start_time)
+
+    rounds = base_rounds + math.floor(math.log2(target_time / base_time))
+    _password_hashing_rounds = max(
+        MIN_PASSWORD_HASHING_ROUNDS, min(MAX_PASSWORD_HASHING_ROUNDS, rounds)
+    )
+    return _password_hashing_rounds
+
+
+def get_password_hash_rounds(hash: bytes) -> int:
+    """Returns the cost factor a password hash was created with"""
+    # Hashes are of the form $2b$<rounds>$<salt and hash>
+    return int(hash.split(b"$")[2])
+
+
+def password_needs_rehash(hash: bytes) -> bool:
+    """Returns whether a password hash was created with a different cost
+    factor to the one currently used for hashing passwords"""
+    return get_password_hash_rounds(hash) != _password_hashing_rounds
+
+
 def hash_password(password: str) -> bytes:
     """Returns the hash of a password"""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    return bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=_password_hashing_rounds)
+    )
 
 
 def verify_password(password: str, hash: bytes) -> bool:
@@ -17,6 +89,59 @@ def verify_password(password: str, hash: bytes) -> bool:
     return bcrypt.checkpw(password.encode("utf-8"), hash)
 
 
+# Default number of threads used for hashing passwords when not configured
+DEFAULT_PASSWORD_HASHING_WORKERS = 2
+
+_password_hashing_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure_password_hashing(max_workers: int) -> None:
+    """Sets the number of passwords that may be hashed/verified concurrently
+    by hash_password_async and verify_password_async
+
+    Args:
+        max_workers (int): Maximum number of threads to use for bcrypt
+    """
+    global _password_hashing_executor
+
+    shutdown_password_hashing()
+    _password_hashing_executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="password_hashing"
+    )
+
+
+def shutdown_password_hashing() -> None:
+    """Shuts down the thread pool used for hashing passwords (if started)"""
+    global _password_hashing_executor
+
+    if _password_hashing_executor is not None:
+        _password_hashing_executor.shutdown(wait=False)
+        _password_hashing_executor = None
+
+
+def _get_password_hashing_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool used for hashing passwords (creating it with
+    the default number of workers if it hasn't been configured)"""
+    if _password_hashing_executor is None:
+        configure_password_hashing(DEFAULT_PASSWORD_HASHING_WORKERS)
+    return _password_hashing_executor
+
+
+async def hash_password_async(password: str) -> bytes:
+    """Returns the hash of a password without blocking the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_password_hashing_executor(), hash_password, password
+    )
+
+
+async def verify_password_async(password: str, hash: bytes) -> bool:
+    """Returns whether a password matches it's hash without blocking the event
+    loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_password_hashing_executor(), verify_password, password, hash
+    )
+
+
 def get_jwt_expiry_time(seconds_to_expiry: int) -> datetime:
     """Returns the datetime of expiry from now"""
     return datetime.utcnow() + timedelta(seconds=seconds_to_expiry)
@@ -1,5 +1,8 @@
+import time
 import uuid
 from datetime import datetime, timezone
+from typing import Any, Optional
+
 from fastapi import Response
 
 from homecontrol_base.exceptions import (
@@ -8,6 +11,11 @@ from homecontrol_base.exceptions import (
 )
 from homecontrol_base.service.core import BaseService
 
+from homecontrol_api.authentication.cache import (
+    CachedSession,
+    verified_session_cache,
+)
+from homecontrol_api.authentication.revocation import access_token_revocations
 from homecontrol_api.authentication.schemas import (
     InternalUserSession,
     LoginPost,
@@ -20,10 +28,12 @@ from homecontrol_api.authentication.schemas import (
 from homecontrol_api.authentication.security import (
     generate_jwt,
     get_jwt_expiry_time,
-    hash_password,
+    hash_password_async,
+    password_needs_rehash,
     verify_jwt,
-    verify_password,
+    verify_password_async,
 )
+from homecontrol_api.authentication.throttle import get_login_throttle
 from homecontrol_api.config.api import APIConfig
 from homecontrol_api.database.database import HomeControlAPIDatabaseConnection
 from homecontrol_api.database.models import UserInDB, UserSessionInDB
@@ -42,17 +52,7 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
 
         self._api_config = api_config
 
-    def _get_user(self, user_id: str) -> User:
-        """Returns a user given their ID
-        Args:
-            user_id (str): ID of the user
-
-        Raises:
-            DatabaseEntryNotFoundError: If the user isn't present in the database
-        """
-        return User.model_validate(self.db_conn.users.get(user_id))
-
-    def create_user(self, user_info: UserPost) -> User:
+    async def create_user(self, user_info: UserPost) -> User:
         """Creates a user
 
         Args:
@@ -68,26 +68,26 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
 
         # Is this the first user? - if so create an enabled admin, otherwise
         # a default account that is disabled
-        first_user = self.db_conn.users.count() == 0
+        first_user = (await self.db_conn.users.count()) == 0
         account_type = UserAccountType.ADMIN if first_user else UserAccountType.DEFAULT
 
         # Create the database model
         user = UserInDB(
             username=user_info.username,
-            hashed_password=hash_password(user_info.password),
+            hashed_password=await hash_password_async(user_info.password),
             account_type=account_type,
             enabled=first_user,
         )
         # Add to the database
         try:
-            user = self.db_conn.users.create(user)
+            user = await self.db_conn.users.create(user)
         except DatabaseDuplicateEntryFoundError as exc:
             raise UsernameAlreadyExistsError(str(exc)) from exc
 
         # Return the created user
         return User.model_validate(user)
 
-    def update_user(self, user_id: str, user_data: UserPatch) -> User:
+    async def update_user(self, user_id: str, user_data: UserPatch) -> User:
         """Updates a user
 
         Args:
@@ -96,7 +96,7 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
         """
 
         # Obtain the user
-        user = self.db_conn.users.get(user_id)
+        user = await self.db_conn.users.get(user_id)
 
         # Assign the new data
         update_data = user_data.model_dump(exclude_unset=True)
@@ -104,26 +104,83 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             setattr(user, key, value)
 
         # Update and return the updated data
-        self.db_conn.users.update(user)
+        await self.db_conn.users.update(user)
+        self._invalidate_user_after_commit(user_id)
+
+        # Disabled users shouldn't be able to refresh their sessions either
+        if user_data.enabled is False:
+            await self.revoke_user_sessions(user_id)
+
         return User.model_validate(user)
 
-    def delete_user(self, user_id: str) -> None:
+    async def delete_user(self, user_id: str) -> None:
         """Deletes a user
 
         Args:
             user_id (str): ID of the user to delete
         """
-        # TODO: Delete sessions as well?
-        self.db_conn.users.delete(user_id)
+        await self.db_conn.users.delete(user_id)
+        await self.revoke_user_sessions(user_id)
+
+    async def revoke_user_sessions(self, user_id: str) -> int:
+        """Invalidates all sessions belonging to a user
+
+        Args:
+            user_id (str): ID of the user whose sessions should be invalidated
+
+        Returns:
+            int: Number of sessions invalidated
+        """
+        rows_deleted = await self.db_conn.user_sessions.delete_all_for_user(user_id)
+        self._invalidate_user_after_commit(user_id)
+        return rows_deleted
 
-    def _generate_access_token(self, session_id: str) -> str:
-        """Generates an access token"""
+    def _invalidate_user_after_commit(self, user_id: str) -> None:
+        """Evicts a user's cached sessions and revokes their access tokens
+        once the current changes are committed (so a request reading the old
+        data before then can't cache it again afterwards)"""
+
+        def invalidate_user():
+            verified_session_cache.evict_user(user_id)
+            access_token_revocations.revoke_user(user_id)
+
+        self.db_conn.after_commit(invalidate_user)
+
+    def _generate_access_token(
+        self, session_id: str, user: Optional[UserInDB] = None
+    ) -> str:
+        """Generates an access token
+
+        Args:
+            session_id (str): ID of the session the access token should be
+                              tied to
+            user (Optional[UserInDB]): User the session belongs to. When
+                                       stateless access tokens are enabled
+                                       this is embedded in the token so it
+                                       can be verified without the database.
+        """
+        payload = {"session_id": str(session_id)}
+        if self._api_config.security.stateless_access_tokens and user is not None:
+            payload = {
+                **payload,
+                "user_id": str(user.id),
+                "username": user.username,
+                "account_type": user.account_type,
+                "enabled": user.enabled,
+                "version": access_token_revocations.get_user_version(user.id),
+                "iat": time.time(),
+            }
         return generate_jwt(
-            payload={"session_id": str(session_id)},
+            payload=payload,
             key=self._api_config.security.jwt_key,
             seconds_to_expiry=self._api_config.security.access_token_expiry,
         )
 
+    def _get_access_token_revocation_time(self) -> float:
+        """Returns the time (seconds since the epoch) after which any access
+        token issued so far will have expired"""
+        return time.time() + self._api_config.security.access_token_expiry
+
     def _get_refresh_expiry_seconds(self, long_lived: bool) -> int:
         """Returns the refresh token expiry time from the settings"""
         return (
@@ -147,7 +204,9 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             seconds_to_expiry=self._get_refresh_expiry_seconds(long_lived),
         )
 
-    def _create_user_session(self, user: User, long_lived: bool) -> InternalUserSession:
+    async def _create_user_session(
+        self, user: User, long_lived: bool
+    ) -> InternalUserSession:
         """Creates a session for a given User (assumes authentication already done)
 
         Args:
@@ -162,7 +221,7 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
         user_session = UserSessionInDB(
             id=session_id,
             user_id=user.id,
-            access_token=self._generate_access_token(session_id),
+            access_token=self._generate_access_token(session_id, user),
             refresh_token=self._generate_refresh_token(
                 session_id, long_lived=long_lived
             ),
@@ -172,7 +231,7 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             ),
         )
         # Save in the db
-        user_session = self.db_conn.user_sessions.create(user_session)
+        user_session = await self.db_conn.user_sessions.create(user_session)
         return InternalUserSession.model_validate(user_session)
 
     def _assign_session_tokens(
@@ -201,35 +260,65 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             httponly=True,
         )
 
-    def login(self, login_info: LoginPost, response: Response) -> UserSession:
+    async def login(
+        self,
+        login_info: LoginPost,
+        response: Response,
+        client_host: Optional[str] = None,
+    ) -> UserSession:
         """Logs in as a given user using a username and password
 
         Args:
             login_info (LoginPost): User login information
             response (Response): FastAPI response (for setting cookies)
+            client_host (Optional[str]): Address of the client logging in
+                                         (for throttling failed attempts)
 
         Returns:
             UserSession: New session fot the user to use
 
         Raises:
             AuthenticationError: If either the username or password is wrong
+            TooManyRequestsError: If there have been too many failed attempts
+                                  to log in as the user or from the client
         """
-        # Attempt to obtain the user
-        user = None
+        # Reserve an attempt before spending time verifying the password
+        login_throttle = get_login_throttle()
+        login_throttle.check(login_info.username, client_host)
+
+        settled = False
         try:
-            user = self.db_conn.users.get_by_username(login_info.username)
-        except DatabaseEntryNotFoundError:
-            pass
-        # Now verify the password
-        if not user or not verify_password(login_info.password, user.hashed_password):
-            raise AuthenticationError("Invalid username or password")
+            # Attempt to obtain the user
+            user = None
+            try:
+                user = await self.db_conn.users.get_by_username(login_info.username)
+            except DatabaseEntryNotFoundError:
+                pass
+            # Now verify the password
+            if not user or not await verify_password_async(
+                login_info.password, user.hashed_password
+            ):
+                login_throttle.record_failure(login_info.username, client_host)
+                settled = True
+                raise AuthenticationError("Invalid username or password")
+            login_throttle.record_success(login_info.username, client_host)
+            settled = True
+        finally:
+            # Give back the attempt if it couldn't be decided either way
+            if not settled:
+                login_throttle.release(login_info.username, client_host)
+
+        # Keep the cost of hashing up to date with the current settings
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await hash_password_async(login_info.password)
+            await self.db_conn.users.update(user)
 
         # Ensure the account is active
         if not user.enabled:
             raise AuthenticationError("Account is disabled. Please contact an admin.")
 
         # If got here, can create a new session
-        internal_user_session = self._create_user_session(
+        internal_user_session = await self._create_user_session(
             user,
             # Don't allow admins to have long sessions
             long_lived=login_info.long_lived
@@ -240,7 +329,70 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
 
         return UserSession.model_validate(internal_user_session)
 
-    def authenticate_user_session(self, access_token: str) -> UserSession:
+    def _verify_access_token(
+        self, access_token: str, user_session: UserSessionInDB
+    ) -> None:
+        """Verifies an access token is the one for a session
+
+        Raises:
+            AuthenticationError: If the token is no longer valid for the
+                                 session it was made for
+        """
+        if user_session.access_token != access_token:
+            raise AuthenticationError("Invalid token")
+
+    def _authenticate_stateless(
+        self, access_token: str, payload: dict[str, Any]
+    ) -> Optional[CachedSession]:
+        """Authenticate a user session using only the contents of its access
+        token (for when stateless access tokens are enabled)
+
+        Args:
+            access_token (str): Access token of the user
+            payload (dict[str, Any]): Verified payload of the access token
+
+        Returns:
+            Optional[CachedSession]: The user and their session, or None if
+                                     the token can't be verified this way
+                                     and the database should be used instead
+
+        Raises:
+            AuthenticationError: If the token has been revoked
+        """
+        if (
+            not self._api_config.security.stateless_access_tokens
+            or "version" not in payload
+            or "enabled" not in payload
+            # Can only trust the revocation list for tokens issued since it
+            # started recording
+            or not access_token_revocations.covers(payload["iat"])
+        ):
+            return None
+
+        if access_token_revocations.is_revoked(
+            access_token,
+            user_session_id=payload["session_id"],
+            user_id=payload["user_id"],
+            version=payload["version"],
+        ):
+            raise AuthenticationError("Invalid token")
+        if not payload["enabled"]:
+            raise AuthenticationError("User is disabled")
+
+        return CachedSession(
+            user=User(
+                id=payload["user_id"],
+                username=payload["username"],
+                account_type=payload["account_type"],
+                enabled=payload["enabled"],
+            ),
+            user_session=UserSession(
+                id=payload["session_id"], user_id=payload["user_id"]
+            ),
+            expiry=payload["exp"],
+        )
+
+    async def authenticate_user_session(self, access_token: str) -> UserSession:
         """Authenticate a user session using an access token
 
         Will validate the access token and use it to check the user has a
@@ -256,24 +408,29 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             AuthenticationError: If the token has expired, or is no longer
                                  valid for the session it was made for
         """
+        cached_session = verified_session_cache.get(access_token)
+        if cached_session is not None:
+            return cached_session.user_session
+
         # Verify the token
         payload = verify_jwt(access_token, self._api_config.security.jwt_key)
-        # Obtain the session
-        session = self.db_conn.user_sessions.get(payload["session_id"])
+        stateless_session = self._authenticate_stateless(access_token, payload)
+        if stateless_session is not None:
+            return stateless_session.user_session
 
-        # Verify the token is the one for the session
-        if session.access_token != access_token:
-            raise AuthenticationError("Invalid token")
+        # Obtain the session
+        session = await self.db_conn.user_sessions.get(payload["session_id"])
+        self._verify_access_token(access_token, session)
 
         return UserSession.model_validate(session)
 
-    def authenticate_user(self, access_token: str) -> User:
+    async def authenticate_user(self, access_token: str) -> User:
         """Authenticate a user using an access token
 
         Will validate the access token and use it to check the user has a
         valid session then return the user from that session while ensuring it
-        is also enabled.
-
+        is also enabled. Successful lookups are cached until the access token
+        expires.
 
         Args:
             access_token (str): Access token of the user
@@ -285,15 +442,38 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             AuthenticationError: If the token has expired, or is no longer
                                  valid for the session it was made for
         """
+        cached_session = verified_session_cache.get(access_token)
+        if cached_session is not None:
+            return cached_session.user
 
-        user = self._get_user(
-            self.authenticate_user_session(access_token=access_token).user_id
+        # Verify the token
+        payload = verify_jwt(access_token, self._api_config.security.jwt_key)
+        stateless_session = self._authenticate_stateless(access_token, payload)
+        if stateless_session is not None:
+            return stateless_session.user
+
+        # Obtain the session along with its user (noting the generation first
+        # so it isn't cached if it is evicted while this is read)
+        generation = verified_session_cache.get_generation()
+        session, user_in_db = await self.db_conn.user_sessions.get_with_user(
+            payload["session_id"]
         )
+        self._verify_access_token(access_token, session)
+
+        user = User.model_validate(user_in_db)
         if not user.enabled:
             raise AuthenticationError("User is disabled")
+
+        verified_session_cache.add(
+            access_token,
+            user=user,
+            user_session=UserSession.model_validate(session),
+            expiry=payload["exp"],
+            generation=generation,
+        )
         return user
 
-    def refresh_user_session(
+    async def refresh_user_session(
         self, refresh_token: str, response: Response
     ) -> UserSession:
         """Refresh a user session given a refresh token
@@ -309,23 +489,30 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
             UserSession: Updated session for the user to use
 
         Raises:
-            AuthenticationError: If the token has expired, or is no longer
-                                 valid for the session it was made for
+            AuthenticationError: If the token has expired, is no longer
+                                 valid for the session it was made for, or
+                                 the user is disabled
         """
 
         # Verify the token
         payload = verify_jwt(refresh_token, self._api_config.security.jwt_key)
         # Obtain the session
-        user_session = self.db_conn.user_sessions.get(payload["session_id"])
+        user_session = await self.db_conn.user_sessions.get(payload["session_id"])
 
         # Verify the token is the one for the session
         if user_session.refresh_token != refresh_token:
             raise AuthenticationError("Invalid token")
 
+        # Disabled users can't be given new tokens
+        user = await self.db_conn.users.get(str(user_session.user_id))
+        if not user.enabled:
+            raise AuthenticationError("User is disabled")
+
         # If reached here - the refresh token is valid, so update the
         # access and refresh tokens with new ones
+        previous_access_token = user_session.access_token
         user_session.access_token = self._generate_access_token(
-            session_id=str(user_session.id)
+            session_id=str(user_session.id), user=user
         )
         user_session.refresh_token = self._generate_refresh_token(
             session_id=str(user_session.id), long_lived=user_session.long_lived
@@ -335,14 +522,24 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
                 long_lived=user_session.long_lived
             )
         )
-        self.db_conn.user_sessions.update(user_session)
+        await self.db_conn.user_sessions.update(user_session)
+        # The old access token is no longer valid once committed
+        revoke_until = self._get_access_token_revocation_time()
+
+        def invalidate_previous_access_token():
+            verified_session_cache.evict_session(user_session.id)
+            access_token_revocations.revoke_token(
+                previous_access_token, until=revoke_until
+            )
+
+        self.db_conn.after_commit(invalidate_previous_access_token)
 
         internal_user_session = InternalUserSession.model_validate(user_session)
         self._assign_session_tokens(internal_user_session, response)
 
         return UserSession.model_validate(internal_user_session)
 
-    def logout(self, user_session_id: str, response: Response) -> None:
+    async def logout(self, user_session_id: str, response: Response) -> None:
         """Invalidate a user session
 
         Args:
@@ -351,12 +548,52 @@ class AuthService(BaseService[HomeControlAPIDatabaseConnection]):
         """
 
         # Delete the session
-        self.db_conn.user_sessions.delete(user_session_id=user_session_id)
+        await self.db_conn.user_sessions.delete(user_session_id=user_session_id)
+        revoke_until = self._get_access_token_revocation_time()
+
+        def invalidate_session():
+            verified_session_cache.evict_session(user_session_id)
+            access_token_revocations.revoke_session(
+                user_session_id, until=revoke_until
+            )
+
+        self.db_conn.after_commit(invalidate_session)
 
         response.delete_cookie("access_token")
         response.delete_cookie("refresh_token")
 
-    def delete_all_expired_sessions(self) -> None:
-        """Delete all expired sessions from the database"""
+    async def delete_all_expired_sessions(
+        self, chunk_size: Optional[int] = None
+    ) -> int:
+        """Delete all expired sessions from the database
 
-        self.db_conn.user_sessions.delete_sessions_expired_before(datetime.utcnow())
+        When deleting in chunks the connection is committed after each one,
+        so this should be used with a connection of its own rather than as
+        part of a request's unit of work (see ExpiredSessionSweeper).
+
+        Args:
+            chunk_size (Optional[int]): When given, sessions are deleted in
+                                        chunks of at most this many rows
+                                        rather than all at once
+
+        Returns:
+            int: Number of sessions deleted
+        """
+
+        current_time = datetime.utcnow()
+        if chunk_size is None:
+            return await self.db_conn.user_sessions.delete_sessions_expired_before(
+                current_time
+            )
+
+        total_deleted = 0
+        while True:
+            user_sessions = self.db_conn.user_sessions
+            rows_deleted = await user_sessions.delete_sessions_expired_before(
+                current_time, limit=chunk_size
+            )
+            # Commit each chunk so locks aren't held for the whole sweep
+            await self.db_conn.commit()
+            total_deleted += rows_deleted
+            if rows_deleted < chunk_size:
+                return total_deleted
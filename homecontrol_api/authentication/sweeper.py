@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from homecontrol_api.authentication.service import AuthService
+from homecontrol_api.config.api import get_api_config
+from homecontrol_api.database.database import database as homecontrol_api_db
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiredSessionSweeper:
+    """Periodically deletes expired user sessions from the database while
+    the API is running"""
+
+    _task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        """Deletes all currently expired sessions (in chunks)
+
+        Returns:
+            int: Number of sessions deleted
+        """
+        api_config = get_api_config()
+        start_time = time.perf_counter()
+        async with homecontrol_api_db.connect() as conn:
+            auth_service = AuthService(conn, api_config)
+            rows_deleted = await auth_service.delete_all_expired_sessions(
+                chunk_size=api_config.security.session_sweep_chunk_size
+            )
+        logger.info(
+            "Deleted %d expired user sessions in %.3fs",
+            rows_deleted,
+            time.perf_counter() - start_time,
+        )
+        return rows_deleted
+
+    async def _run(self):
+        """Sweeps at the configured interval until cancelled"""
+        while True:
+            await asyncio.sleep(get_api_config().security.session_sweep_interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Failed to delete expired user sessions")
+
+    def start(self):
+        """Start sweeping periodically"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sweeping"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
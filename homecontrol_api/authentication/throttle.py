@@ -0,0 +1,200 @@
+import math
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from homecontrol_api.config.api import APIConfigLoginThrottleData
+from homecontrol_api.exceptions import TooManyRequestsError
+
+
+@dataclass
+class _Bucket:
+    """Token bucket of failed login attempts for a single key"""
+
+    tokens: float
+    updated: float
+    # Number of consecutive times the key has been locked out
+    lockouts: int = 0
+    locked_until: float = 0
+
+
+class LoginThrottle:
+    """In-memory limiter of failed login attempts per username and per client
+    IP address
+
+    Each key has a token bucket that attempts are taken from when checked
+    (and given back to the client if successful). Once a failed attempt
+    empties a bucket the key is locked out, with the lockout doubling each
+    consecutive time until the bucket has had chance to refill completely.
+    Checking happens before the password is verified so locked out clients
+    can't make the API spend time hashing.
+
+    At most max_entries keys are tracked. Once full, keys that would behave
+    the same as new ones are removed, and then the oldest if still full.
+    """
+
+    _config: APIConfigLoginThrottleData
+    _buckets: dict[str, _Bucket]
+    _lock: Lock
+
+    def __init__(self, config: APIConfigLoginThrottleData) -> None:
+        self._config = config
+        self._buckets = {}
+        self._lock = Lock()
+
+    def _get_keys(self, username: str, client_host: Optional[str]) -> list[str]:
+        """Returns the keys of the buckets to use for an attempt"""
+        keys = [f"username:{username}"]
+        if client_host is not None:
+            keys.append(f"client:{client_host}")
+        return keys
+
+    def _refill(self, bucket: _Bucket, now: float) -> None:
+        """Adds tokens to a bucket for the time passed since it was last
+        updated"""
+        bucket.tokens = min(
+            self._config.burst,
+            bucket.tokens
+            + (now - bucket.updated) * self._config.rate_per_minute / 60,
+        )
+        bucket.updated = now
+        # Forget previous lockouts once the bucket has completely refilled
+        if bucket.tokens >= self._config.burst and bucket.locked_until <= now:
+            bucket.lockouts = 0
+
+    def _get_bucket(self, key: str, now: float) -> _Bucket:
+        """Returns the refilled bucket for a key, creating it if needed (lock
+        must be held)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._config.max_entries:
+                self._remove_idle(now)
+                # Still full, so drop the oldest buckets
+                while len(self._buckets) >= self._config.max_entries:
+                    del self._buckets[next(iter(self._buckets))]
+            bucket = _Bucket(tokens=self._config.burst, updated=now)
+            self._buckets[key] = bucket
+        self._refill(bucket, now)
+        return bucket
+
+    def _get_allowed_at(self, bucket: _Bucket, now: float) -> float:
+        """Returns the time a bucket is unlocked and has an attempt left
+        (attempts may be used up by others still in progress)"""
+        if bucket.tokens >= 1:
+            return bucket.locked_until
+        if self._config.rate_per_minute <= 0:
+            return math.inf
+        return max(
+            bucket.locked_until,
+            now + (1 - bucket.tokens) * 60 / self._config.rate_per_minute,
+        )
+
+    def check(self, username: str, client_host: Optional[str]) -> None:
+        """Checks whether a login attempt is allowed, reserving one attempt
+        from the username and client (so concurrent attempts can't all pass
+        before any of them fail)
+
+        Every allowed attempt must be followed by record_failure,
+        record_success or (if it couldn't be decided) release.
+
+        Args:
+            username (str): Username being logged into
+            client_host (Optional[str]): Address of the client making the
+                                         attempt (if known)
+
+        Raises:
+            TooManyRequestsError: If the username or client is locked out, or
+                                  has no attempts left
+        """
+        if not self._config.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            buckets = [
+                self._get_bucket(key, now)
+                for key in self._get_keys(username, client_host)
+            ]
+
+            allowed_at = max(self._get_allowed_at(bucket, now) for bucket in buckets)
+            if allowed_at <= now:
+                for bucket in buckets:
+                    bucket.tokens -= 1
+                return
+
+        raise TooManyRequestsError(
+            "Too many failed login attempts. Please try again in "
+            f"{math.ceil(allowed_at - now)} seconds."
+        )
+
+    def record_failure(self, username: str, client_host: Optional[str]) -> None:
+        """Records a failed login attempt (already reserved by check),
+        locking out the username and/or client if they have run out of
+        attempts"""
+        if not self._config.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            for key in self._get_keys(username, client_host):
+                bucket = self._get_bucket(key, now)
+                # Concurrent failures only lock out once
+                if bucket.tokens < 1 and bucket.locked_until <= now:
+                    bucket.lockouts += 1
+                    bucket.locked_until = now + min(
+                        self._config.lockout_base * 2 ** (bucket.lockouts - 1),
+                        self._config.lockout_max,
+                    )
+
+    def record_success(self, username: str, client_host: Optional[str]) -> None:
+        """Records a successful login, resetting any failed attempts for the
+        username and returning the attempt reserved from the client (but not
+        resetting the client, so a valid login can't be used to reset a
+        client guessing other passwords)"""
+        if not self._config.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._buckets.pop(f"username:{username}", None)
+            if client_host is not None:
+                bucket = self._get_bucket(f"client:{client_host}", now)
+                bucket.tokens = min(self._config.burst, bucket.tokens + 1)
+
+    def release(self, username: str, client_host: Optional[str]) -> None:
+        """Returns an attempt reserved by check without recording whether it
+        succeeded (for when verifying it failed e.g. due to a database
+        error)"""
+        if not self._config.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            for key in self._get_keys(username, client_host):
+                bucket = self._get_bucket(key, now)
+                bucket.tokens = min(self._config.burst, bucket.tokens + 1)
+
+    def _remove_idle(self, now: float) -> None:
+        """Removes buckets that have completely refilled and so would behave
+        the same as a new one (lock must be held)"""
+        for key, bucket in list(self._buckets.items()):
+            self._refill(bucket, now)
+            if bucket.tokens >= self._config.burst and bucket.lockouts == 0:
+                del self._buckets[key]
+
+
+_login_throttle = LoginThrottle(APIConfigLoginThrottleData())
+
+
+def configure_login_throttle(config: APIConfigLoginThrottleData) -> None:
+    """Replaces the login throttle used by this process with one using the
+    given config"""
+    global _login_throttle
+
+    _login_throttle = LoginThrottle(config)
+
+
+def get_login_throttle() -> LoginThrottle:
+    """Returns the login throttle used by this process"""
+    return _login_throttle
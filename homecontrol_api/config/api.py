@@ -1,8 +1,39 @@
+import logging
+import os
+import time
+from dataclasses import field
+from threading import Lock
+from typing import Optional
+
 from homecontrol_base.config.base import BaseConfig
 from pydantic.dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
+# Name of the file the API config is loaded from
+API_CONFIG_FILENAME = "api.json"
+
+
+@dataclass(frozen=True)
+class APIConfigLoginThrottleData:
+    """API config for throttling failed login attempts (applied separately
+    per username and per client IP address)"""
 
-@dataclass
+    enabled: bool = True
+    # Number of failed attempts allowed before being locked out
+    burst: int = 5
+    # Rate at which further attempts are allowed again
+    rate_per_minute: float = 5
+    # Time in seconds of the first lockout (doubles with each consecutive
+    # lockout)
+    lockout_base: int = 30
+    # Maximum time in seconds of a lockout
+    lockout_max: int = 900
+    # Maximum number of usernames/clients to track
+    max_entries: int = 10000
+
+
+@dataclass(frozen=True)
 class APIConfigSecurityData:
     """API config for security"""
 
@@ -11,21 +42,62 @@ class APIConfigSecurityData:
     refresh_token_expiry: int
     long_lived_refresh_token_expiry: int
     cors_allow_origins: list[str]
+    # Maximum number of passwords hashed/verified at once (bcrypt runs on a
+    # thread pool of this size to avoid blocking the event loop)
+    password_hashing_workers: int = 2
+    # Time in seconds hashing a password should take on this machine. Used
+    # to pick bcrypt's cost factor on startup (bcrypt's default of 12 is used
+    # when not given). On slow machines this may be below the default, but
+    # never below 10. Must be positive. Existing passwords are rehashed on
+    # login.
+    password_hashing_target_time: Optional[float] = None
+    # Whether access tokens should carry enough information about the user
+    # to be verified without the database (revocations are only tracked in
+    # memory, so this should only be enabled when running a single process)
+    stateless_access_tokens: bool = False
+    # Interval in seconds between deleting expired user sessions
+    session_sweep_interval: int = 3600
+    # Maximum number of expired user sessions deleted in a single statement
+    session_sweep_chunk_size: int = 1000
+    login_throttle: APIConfigLoginThrottleData = field(
+        default_factory=APIConfigLoginThrottleData
+    )
+
+
+@dataclass(frozen=True)
+class APIConfigTemperatureData:
+    """API config for monitoring temperatures"""
 
+    # Time in seconds to wait for a device's state when recording temperatures
+    # before skipping it for that sample
+    device_timeout: float = 10
+    # Maximum number of points in the shared time axis of a temperature grid
+    max_grid_points: int = 10000
+    # Number of hours of the most recent temperatures kept in memory to serve
+    # queries from (0 to disable)
+    buffer_hours: float = 48
+    # Maximum number of temperatures kept in memory per room
+    buffer_capacity: int = 10000
+    # Number of worker processes used to compute temperature statistics
+    statistics_workers: int = 1
 
-@dataclass
+
+@dataclass(frozen=True)
 class APIConfigData:
     """API config for homecontrol-api"""
 
     root_path: str
     security: APIConfigSecurityData
+    temperature: APIConfigTemperatureData = field(
+        default_factory=APIConfigTemperatureData
+    )
 
 
 class APIConfig(BaseConfig[APIConfigData]):
     """API config for homecontrol-api"""
 
     def __init__(self) -> None:
-        super().__init__("api.json", APIConfigData)
+        super().__init__(API_CONFIG_FILENAME, APIConfigData)
 
     @property
     def root_path(self) -> str:
@@ -34,3 +106,103 @@ class APIConfig(BaseConfig[APIConfigData]):
     @property
     def security(self) -> APIConfigSecurityData:
         return self._data.security
+
+    @property
+    def temperature(self) -> APIConfigTemperatureData:
+        return self._data.temperature
+
+
+class _APIConfigCache:
+    """Holds a single APIConfig shared by the whole process, only loading it
+    again when the file it comes from is modified
+
+    The file's modification time is checked at most once per check_interval
+    so that the hot path only reads a cached value. A new config is swapped
+    in whole, so callers always see either the old or new config and never a
+    mixture.
+    """
+
+    _check_interval: float
+    _config: Optional[APIConfig] = None
+    _mtime: Optional[float] = None
+    _last_checked: float = 0
+    _reload_count: int = 0
+    _lock: Lock
+
+    def __init__(self, check_interval: float = 1) -> None:
+        self._check_interval = check_interval
+        self._lock = Lock()
+
+    def _get_mtime(self) -> Optional[float]:
+        """Returns the modification time of the config file (or None if it
+        can't be found)"""
+        try:
+            return os.stat(API_CONFIG_FILENAME).st_mtime
+        except OSError:
+            return None
+
+    def _is_fresh(self, now: float) -> bool:
+        """Returns whether the config is loaded and was checked recently
+        enough that the file doesn't need checking again"""
+        return (
+            self._config is not None
+            and now - self._last_checked < self._check_interval
+        )
+
+    def get(self) -> APIConfig:
+        """Returns the current config, loading it on first use or if the file
+        has been modified since it was last loaded
+
+        Raises:
+            Any error from loading the config on first use (later failures
+            are logged and the previous config kept)
+        """
+        now = time.monotonic()
+        if self._is_fresh(now):
+            return self._config
+
+        with self._lock:
+            if self._is_fresh(now):
+                return self._config
+            self._last_checked = now
+
+            mtime = self._get_mtime()
+            if self._config is None:
+                self._config = APIConfig()
+                self._mtime = mtime
+            elif mtime is not None and mtime != self._mtime:
+                # Recorded even on failure so a broken file isn't loaded again
+                # until it is modified
+                self._mtime = mtime
+                try:
+                    self._config = APIConfig()
+                except Exception:
+                    logger.exception(
+                        "Failed to reload '%s', keeping the previous config",
+                        API_CONFIG_FILENAME,
+                    )
+                else:
+                    self._reload_count += 1
+                    logger.info("Reloaded '%s'", API_CONFIG_FILENAME)
+            return self._config
+
+    @property
+    def reload_count(self) -> int:
+        """Number of times the config has been reloaded after first being
+        loaded"""
+        return self._reload_count
+
+
+_api_config_cache = _APIConfigCache()
+
+
+def get_api_config() -> APIConfig:
+    """Returns the API config shared by this process (reloaded when api.json
+    is modified)"""
+    return _api_config_cache.get()
+
+
+def get_api_config_reload_count() -> int:
+    """Returns the number of times the API config has been reloaded since
+    first being loaded"""
+    return _api_config_cache.reload_count
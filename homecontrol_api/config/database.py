@@ -0,0 +1,10 @@
+from functools import cache
+
+from homecontrol_base.config.database import DatabaseConfig
+
+
+@cache
+def get_database_config() -> DatabaseConfig:
+    """Returns the database config shared by this process (unlike the API
+    config it isn't reloaded, as database engines are only created once)"""
+    return DatabaseConfig()
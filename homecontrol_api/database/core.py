@@ -0,0 +1,162 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import (
+    AsyncGenerator,
+    Callable,
+    Generator,
+    Generic,
+    Optional,
+    Type,
+    TypeVar,
+)
+
+from homecontrol_base.config.database import DatabaseConfig
+from sqlalchemy import event
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Async drivers to use in place of the ones given by the database config
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Key in a session's info of the callbacks to run after its next commit
+AFTER_COMMIT_CALLBACKS = "after_commit_callbacks"
+
+
+def get_async_url(url: URL) -> URL:
+    """Returns a database URL that uses an async driver for the same database
+
+    Raises:
+        ValueError: If there is no known async driver for the database
+    """
+    backend_name = url.get_backend_name()
+    if backend_name not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver available for '{backend_name}'")
+    return url.set(drivername=ASYNC_DRIVERS[backend_name])
+
+
+@dataclass
+class StatementCounter:
+    """Number of statements executed while counting"""
+
+    count: int = 0
+
+
+_statement_counter: ContextVar[Optional[StatementCounter]] = ContextVar(
+    "statement_counter", default=None
+)
+
+
+@contextmanager
+def count_statements() -> Generator[StatementCounter, None, None]:
+    """Counts the statements executed on any AsyncDatabase within this context
+    (including in any tasks started from it)"""
+    counter = StatementCounter()
+    token = _statement_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _statement_counter.reset(token)
+
+
+def _on_before_cursor_execute(*args, **kwargs):
+    """Increments the statement counter of the current context (if any)"""
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+class AsyncDatabaseConnection:
+    """Base class for handling a connection to a database using an
+    AsyncSession"""
+
+    _session: AsyncSession
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Runs a callback once the changes made so far have been committed
+        (e.g. to invalidate in-memory state derived from them). It is
+        discarded if they are rolled back instead.
+
+        Callbacks are shared by all connections using the same session.
+        """
+        self._session.info.setdefault(AFTER_COMMIT_CALLBACKS, []).append(callback)
+
+    async def commit(self):
+        """Commits all changes made using this connection so far (then runs
+        any callbacks waiting for it)"""
+        await self._session.commit()
+        for callback in self._session.info.pop(AFTER_COMMIT_CALLBACKS, []):
+            callback()
+
+    async def rollback(self):
+        """Discards all changes made using this connection since the last
+        commit"""
+        self._session.info.pop(AFTER_COMMIT_CALLBACKS, None)
+        await self._session.rollback()
+
+    async def close(self):
+        """Closes the underlying session"""
+        await self._session.close()
+
+
+TAsyncDatabaseConnection = TypeVar(
+    "TAsyncDatabaseConnection", bound=AsyncDatabaseConnection
+)
+
+
+class AsyncDatabase(Generic[TAsyncDatabaseConnection]):
+    """Base class for a database accessed using asyncio
+
+    Repositories only flush their changes, so each connection acts as a unit
+    of work that must be committed once when done (connect does this
+    automatically).
+    """
+
+    def __init__(
+        self,
+        database_name: str,
+        declarative_base,
+        connection_type: Type[TAsyncDatabaseConnection],
+        config: DatabaseConfig,
+    ) -> None:
+        self._declarative_base = declarative_base
+        self._connection_type = connection_type
+        self._engine = create_async_engine(
+            get_async_url(config.get_url(database_name))
+        )
+        event.listen(
+            self._engine.sync_engine, "before_cursor_execute", _on_before_cursor_execute
+        )
+        # Objects are not expired on commit, as loading their attributes
+        # again can't happen implicitly when using asyncio
+        self._session_maker = async_sessionmaker(self._engine, expire_on_commit=False)
+
+    async def create_tables(self):
+        """Creates all tables in the database (if they don't already exist)"""
+        async with self._engine.begin() as conn:
+            await conn.run_sync(self._declarative_base.metadata.create_all)
+
+    def create_connection(self) -> TAsyncDatabaseConnection:
+        """Returns a new connection to the database that must be committed (if
+        anything was changed) and closed when done (a connection from the pool
+        is only checked out once the first statement is executed)"""
+        return self._connection_type(self._session_maker())
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncGenerator[TAsyncDatabaseConnection, None]:
+        """Returns a connection to the database that is committed and closed
+        when done (or rolled back if an exception is raised)"""
+        async with self._session_maker() as session:
+            conn = self._connection_type(session)
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
@@ -1,10 +1,11 @@
 from typing import Optional
 
 from homecontrol_base.config.database import DatabaseConfig
-from homecontrol_base.database.core import Database, DatabaseConnection
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from homecontrol_api import migrations
+from homecontrol_api.config.database import get_database_config
+from homecontrol_api.database.core import AsyncDatabase, AsyncDatabaseConnection
 from homecontrol_api.database.jobs import JobsDBConnection
 from homecontrol_api.database.models import Base
 from homecontrol_api.database.room_actions import RoomActionsDBConnection
@@ -14,7 +15,7 @@ from homecontrol_api.database.user_sessions import UserSessionsDBConnection
 from homecontrol_api.database.users import UsersDBConnection
 
 
-class HomeControlAPIDatabaseConnection(DatabaseConnection):
+class HomeControlAPIDatabaseConnection(AsyncDatabaseConnection):
     """Class for handling a connection to the homecontrol-api database"""
 
     _users: Optional[UsersDBConnection] = None
@@ -24,7 +25,7 @@ class HomeControlAPIDatabaseConnection(DatabaseConnection):
     _jobs: Optional[JobsDBConnection] = None
     _room_actions: Optional[RoomActionsDBConnection] = None
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
     @property
@@ -70,7 +71,7 @@ class HomeControlAPIDatabaseConnection(DatabaseConnection):
         return self._room_actions
 
 
-class HomeControlAPIDatabase(Database[HomeControlAPIDatabaseConnection]):
+class HomeControlAPIDatabase(AsyncDatabase[HomeControlAPIDatabaseConnection]):
     """Database for storing information handled by homecontrol-api"""
 
     def __init__(self, config: DatabaseConfig) -> None:
@@ -82,4 +83,4 @@ class HomeControlAPIDatabase(Database[HomeControlAPIDatabaseConnection]):
         )
 
 
-database = HomeControlAPIDatabase(DatabaseConfig())
+database = HomeControlAPIDatabase(get_database_config())
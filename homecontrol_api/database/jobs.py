@@ -1,30 +1,30 @@
 from uuid import UUID
 
-from homecontrol_base.database.core import DatabaseConnection
 from homecontrol_base.exceptions import DatabaseEntryNotFoundError
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from homecontrol_api.database.core import AsyncDatabaseConnection
 from homecontrol_api.database.models import JobInDB
 
 
-class JobsDBConnection(DatabaseConnection):
+class JobsDBConnection(AsyncDatabaseConnection):
     """Handles JobInDB's in the database"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    def create(self, job: JobInDB) -> JobInDB:
+    async def create(self, job: JobInDB) -> JobInDB:
         """Adds a JobInDB to the database
 
         Args:
             job (JobInDB): Job to add to the database
         """
         self._session.add(job)
-        self._session.commit()
-        self._session.refresh(job)
+        await self._session.flush()
         return job
 
-    def get(self, job_id: str) -> JobInDB:
+    async def get(self, job_id: str) -> JobInDB:
         """Returns JobInDB given a Job's ID
 
         Args:
@@ -37,25 +37,24 @@ class JobsDBConnection(DatabaseConnection):
             DatabaseEntryNotFoundError: If the Job isn't found
         """
 
-        job = self._session.query(JobInDB).filter(JobInDB.id == UUID(job_id)).first()
+        job = await self._session.get(JobInDB, UUID(job_id))
         if not job:
             raise DatabaseEntryNotFoundError(f"job with id '{job_id}' was not found")
         return job
 
-    def get_all(self) -> list[JobInDB]:
+    async def get_all(self) -> list[JobInDB]:
         """Returns a list of information about all jobs"""
-        return self._session.query(JobInDB).all()
+        return list(await self._session.scalars(select(JobInDB)))
 
-    def count(self) -> int:
+    async def count(self) -> int:
         """Returns the number of jobs in the database"""
-        return self._session.query(JobInDB).count()
+        return await self._session.scalar(select(func.count()).select_from(JobInDB))
 
-    def update(self, job: JobInDB) -> None:
-        """Commits changes that have already been assigned to a Job"""
-        self._session.commit()
-        self._session.refresh(job)
+    async def update(self, job: JobInDB) -> None:
+        """Flushes changes that have already been assigned to a Job"""
+        await self._session.flush()
 
-    def delete(self, job_id: str):
+    async def delete(self, job_id: str):
         """Deletes a JobInDB given the Job's id
 
         Args:
@@ -64,11 +63,9 @@ class JobsDBConnection(DatabaseConnection):
         Raises:
             DatabaseEntryNotFoundError: If the Job isn't found
         """
-        rows_deleted = (
-            self._session.query(JobInDB).filter(JobInDB.id == UUID(job_id)).delete()
+        result = await self._session.execute(
+            delete(JobInDB).where(JobInDB.id == UUID(job_id))
         )
 
-        if rows_deleted == 0:
+        if result.rowcount == 0:
             raise DatabaseEntryNotFoundError(f"Job with id '{job_id}' was not found")
-
-        self._session.commit()
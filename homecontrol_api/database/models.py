@@ -1,6 +1,19 @@
 import uuid
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, Float, LargeBinary, String, Uuid
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Uuid,
+)
 from sqlalchemy.orm import declarative_base
 from sqlalchemy_json import mutable_json_type
 
@@ -25,7 +38,7 @@ class UserSessionInDB(Base):
     access_token = Column(String)
     refresh_token = Column(String)
     long_lived = Column(Boolean)
-    expiry_time = Column(DateTime)
+    expiry_time = Column(DateTime, index=True)
 
 
 class RoomInDB(Base):
@@ -38,13 +51,59 @@ class RoomInDB(Base):
     controllers = Column(mutable_json_type(dbtype=JSON, nested=True))
 
 
+class TemperatureSeriesInDB(Base):
+    """Series of temperatures (referenced by each temperature rather than
+    repeating the room's name)"""
+
+    __tablename__ = "temperature_series"
+
+    id = Column(Integer, primary_key=True)
+    room_name = Column(String, unique=True)
+
+
 class TemperatureInDB(Base):
     __tablename__ = "temperatures"
-
-    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    __table_args__ = (
+        # Matches querying a series over a range of time (and includes the
+        # value and id that are selected so that on PostgreSQL it can be
+        # answered from the index alone)
+        Index(
+            "ix_temperatures_series_id_timestamp",
+            "series_id",
+            "timestamp",
+            postgresql_include=["value", "id"],
+        ),
+    )
+
+    # Integer on SQLite so that it is an alias of the rowid
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
     timestamp = Column(DateTime, index=True)
     value = Column(Float)
-    room_name = Column(String, index=True)
+    series_id = Column(Integer, ForeignKey("temperature_series.id"))
+
+
+class TemperatureRollupMixin:
+    """Summary of the temperatures recorded for a room over an interval"""
+
+    room_name = Column(String, primary_key=True)
+    # Start of the interval
+    timestamp = Column(DateTime, primary_key=True)
+    min_value = Column(Float)
+    max_value = Column(Float)
+    # Sum of the values (so the average can be updated incrementally)
+    total = Column(Float)
+    count = Column(Integer)
+    # Most recent value in the interval
+    last_value = Column(Float)
+    last_timestamp = Column(DateTime)
+
+
+class TemperatureRollupHourlyInDB(TemperatureRollupMixin, Base):
+    __tablename__ = "temperature_rollups_hourly"
+
+
+class TemperatureRollupDailyInDB(TemperatureRollupMixin, Base):
+    __tablename__ = "temperature_rollups_daily"
 
 
 class JobInDB(Base):
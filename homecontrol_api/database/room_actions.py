@@ -1,24 +1,25 @@
 from typing import Optional
 from uuid import UUID
 
-from homecontrol_base.database.core import DatabaseConnection
 from homecontrol_base.exceptions import (
     DatabaseDuplicateEntryFoundError,
     DatabaseEntryNotFoundError,
 )
+from sqlalchemy import delete, func, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from homecontrol_api.database.core import AsyncDatabaseConnection
 from homecontrol_api.database.models import RoomActionInDB, RoomInDB
 
 
-class RoomActionsDBConnection(DatabaseConnection):
+class RoomActionsDBConnection(AsyncDatabaseConnection):
     """Handles RoomActionInDB's in the database"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    def create(self, action: RoomActionInDB) -> RoomActionInDB:
+    async def create(self, action: RoomActionInDB) -> RoomActionInDB:
         """Adds a RoomActionInDB to the database
 
         Args:
@@ -28,18 +29,17 @@ class RoomActionsDBConnection(DatabaseConnection):
             DatabaseDuplicateEntryFoundError: If a room action with the same
                                      name is already present in the database
         """
-        self._session.add(action)
         try:
-            self._session.commit()
+            # Use a savepoint so only this insert is undone on failure
+            async with self._session.begin_nested():
+                self._session.add(action)
         except IntegrityError as exc:
-            self._session.rollback()
             raise DatabaseDuplicateEntryFoundError(
                 f"Room Action with the name '{action.name}' already exists"
             ) from exc
-        self._session.refresh(action)
         return action
 
-    def get(self, action_id: str) -> RoomActionInDB:
+    async def get(self, action_id: str) -> RoomActionInDB:
         """Returns RoomActionInDB given a room action's ID
 
         Args:
@@ -52,38 +52,34 @@ class RoomActionsDBConnection(DatabaseConnection):
             DatabaseEntryNotFoundError: If the room action isn't found
         """
 
-        action = (
-            self._session.query(RoomActionInDB)
-            .filter(RoomActionInDB.id == UUID(action_id))
-            .first()
-        )
+        action = await self._session.get(RoomActionInDB, UUID(action_id))
         if not action:
             raise DatabaseEntryNotFoundError(
                 f"Room Action with id '{action_id}' was not found"
             )
         return action
 
-    def get_all(self, room_id: Optional[str] = None) -> list[RoomActionInDB]:
+    async def get_all(self, room_id: Optional[str] = None) -> list[RoomActionInDB]:
         """Returns a list of information about all room actions with optional query params"""
         filters = []
         if room_id is not None:
             filters.append(RoomActionInDB.room_id == room_id)
 
-        if len(filters) == 0:
-            return self._session.query(RoomActionInDB).all()
-        else:
-            return self._session.query(RoomActionInDB).filter(*filters).all()
+        return list(
+            await self._session.scalars(select(RoomActionInDB).where(*filters))
+        )
 
-    def count(self) -> int:
+    async def count(self) -> int:
         """Returns the number of room actions in the database"""
-        return self._session.query(RoomActionInDB).count()
+        return await self._session.scalar(
+            select(func.count()).select_from(RoomActionInDB)
+        )
 
-    def update(self, action: RoomActionInDB) -> None:
-        """Commits changes that have already been assigned to a room action"""
-        self._session.commit()
-        self._session.refresh(action)
+    async def update(self, action: RoomActionInDB) -> None:
+        """Flushes changes that have already been assigned to a room action"""
+        await self._session.flush()
 
-    def delete(self, action_id: str):
+    async def delete(self, action_id: str):
         """Deletes a RoomActionInDB given the room action's id
 
         Args:
@@ -92,15 +88,11 @@ class RoomActionsDBConnection(DatabaseConnection):
         Raises:
             DatabaseEntryNotFoundError: If the room action isn't found
         """
-        rows_deleted = (
-            self._session.query(RoomActionInDB)
-            .filter(RoomActionInDB.id == UUID(action_id))
-            .delete()
+        result = await self._session.execute(
+            delete(RoomActionInDB).where(RoomActionInDB.id == UUID(action_id))
         )
 
-        if rows_deleted == 0:
+        if result.rowcount == 0:
             raise DatabaseEntryNotFoundError(
                 f"Room Action with id '{action_id}' was not found"
             )
-
-        self._session.commit()
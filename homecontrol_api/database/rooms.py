@@ -1,23 +1,24 @@
 from uuid import UUID
 
-from homecontrol_base.database.core import DatabaseConnection
 from homecontrol_base.exceptions import (
     DatabaseDuplicateEntryFoundError,
     DatabaseEntryNotFoundError,
 )
+from sqlalchemy import delete, func, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from homecontrol_api.database.core import AsyncDatabaseConnection
 from homecontrol_api.database.models import RoomInDB
 
 
-class RoomsDBConnection(DatabaseConnection):
+class RoomsDBConnection(AsyncDatabaseConnection):
     """Handles RoomInDB's in the database"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    def create(self, room: RoomInDB) -> RoomInDB:
+    async def create(self, room: RoomInDB) -> RoomInDB:
         """Adds a RoomInDB to the database
 
         Args:
@@ -27,18 +28,17 @@ class RoomsDBConnection(DatabaseConnection):
             DatabaseDuplicateEntryFoundError: If a room with the same name is
                                               already present in the database
         """
-        self._session.add(room)
         try:
-            self._session.commit()
+            # Use a savepoint so only this insert is undone on failure
+            async with self._session.begin_nested():
+                self._session.add(room)
         except IntegrityError as exc:
-            self._session.rollback()
             raise DatabaseDuplicateEntryFoundError(
                 f"Room with the name '{room.name}' already exists"
             ) from exc
-        self._session.refresh(room)
         return room
 
-    def get(self, room_id: str) -> RoomInDB:
+    async def get(self, room_id: str) -> RoomInDB:
         """Returns RoomInDB given a room's ID
 
         Args:
@@ -51,27 +51,24 @@ class RoomsDBConnection(DatabaseConnection):
             DatabaseEntryNotFoundError: If the room isn't found
         """
 
-        room = (
-            self._session.query(RoomInDB).filter(RoomInDB.id == UUID(room_id)).first()
-        )
+        room = await self._session.get(RoomInDB, UUID(room_id))
         if not room:
             raise DatabaseEntryNotFoundError(f"Room with id '{room_id}' was not found")
         return room
 
-    def get_all(self) -> list[RoomInDB]:
+    async def get_all(self) -> list[RoomInDB]:
         """Returns a list of information about all rooms"""
-        return self._session.query(RoomInDB).all()
+        return list(await self._session.scalars(select(RoomInDB)))
 
-    def count(self) -> int:
+    async def count(self) -> int:
         """Returns the number of rooms in the database"""
-        return self._session.query(RoomInDB).count()
+        return await self._session.scalar(select(func.count()).select_from(RoomInDB))
 
-    def update(self, room: RoomInDB) -> None:
-        """Commits changes that have already been assigned to a room"""
-        self._session.commit()
-        self._session.refresh(room)
+    async def update(self, room: RoomInDB) -> None:
+        """Flushes changes that have already been assigned to a room"""
+        await self._session.flush()
 
-    def delete(self, room_id: str):
+    async def delete(self, room_id: str):
         """Deletes a RoomInDB given the room's id
 
         Args:
@@ -80,11 +77,9 @@ class RoomsDBConnection(DatabaseConnection):
         Raises:
             DatabaseEntryNotFoundError: If the room isn't found
         """
-        rows_deleted = (
-            self._session.query(RoomInDB).filter(RoomInDB.id == UUID(room_id)).delete()
+        result = await self._session.execute(
+            delete(RoomInDB).where(RoomInDB.id == UUID(room_id))
         )
 
-        if rows_deleted == 0:
+        if result.rowcount == 0:
             raise DatabaseEntryNotFoundError(f"Room with id '{room_id}' was not found")
-
-        self._session.commit()
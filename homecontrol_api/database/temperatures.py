@@ -1,54 +1,659 @@
-from datetime import datetime
-from typing import Optional
-from homecontrol_base.database.core import DatabaseConnection
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncGenerator, Iterable, Mapping, Optional, Type, Union
 
-from homecontrol_api.database.models import TemperatureInDB
+from sqlalchemy import (
+    BigInteger,
+    Row,
+    case,
+    and_,
+    cast,
+    delete,
+    extract,
+    func,
+    insert,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from homecontrol_api.database.core import AsyncDatabaseConnection
+from homecontrol_api.database.models import (
+    TemperatureInDB,
+    TemperatureRollupDailyInDB,
+    TemperatureRollupHourlyInDB,
+    TemperatureRollupMixin,
+    TemperatureSeriesInDB,
+)
+from homecontrol_api.temperature.schemas import TemperatureAggregate
 
-class TemperaturesDBConnection(DatabaseConnection):
+# Rollup tables kept up to date with the temperatures, keyed by the number of
+# seconds each row covers
+ROLLUP_MODELS: dict[int, Type[TemperatureRollupMixin]] = {
+    3600: TemperatureRollupHourlyInDB,
+    86400: TemperatureRollupDailyInDB,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+# Maximum number of rollups merged by a single statement (as each takes
+# several parameters and PostgreSQL allows at most 32767 in a statement)
+ROLLUP_UPSERT_CHUNK_SIZE = 1000
+
+
+def get_naive_utc(timestamp: datetime) -> datetime:
+    """Returns a timestamp as a naive UTC time (as temperatures are stored)
+    when it has a timezone"""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def get_bucket_start(timestamp: datetime, bucket_size: int) -> datetime:
+    """Returns the start of the bucket (aligned to the epoch) of a number of
+    seconds a timestamp falls in"""
+    return EPOCH + timedelta(
+        seconds=(timestamp - EPOCH) // timedelta(seconds=bucket_size) * bucket_size
+    )
+
+
+class TemperaturesDBConnection(AsyncDatabaseConnection):
     """Handles TemperatureInDB's in the database"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    def create(self, temperature: TemperatureInDB) -> TemperatureInDB:
-        """Adds a TemperatureInDB to the database
+    def _insert(self, model):
+        """Returns an insert statement for the current dialect (to allow
+        handling conflicts)"""
+        if self._session.bind.dialect.name == "sqlite":
+            return sqlite.insert(model)
+        return postgresql.insert(model)
+
+    async def _get_series_ids(self, room_names: Iterable[str]) -> dict[str, int]:
+        """Returns the IDs of the series used to store the temperatures of
+        some rooms (creating any that don't exist yet)"""
+        room_names = set(room_names)
+        statement = select(
+            TemperatureSeriesInDB.room_name, TemperatureSeriesInDB.id
+        ).where(TemperatureSeriesInDB.room_name.in_(room_names))
+
+        series_ids = dict((await self._session.execute(statement)).all())
+        missing = room_names - series_ids.keys()
+        if missing:
+            # Ignore conflicts in case another connection adds the same ones
+            await self._session.execute(
+                self._insert(TemperatureSeriesInDB)
+                .values([{"room_name": room_name} for room_name in missing])
+                .on_conflict_do_nothing(
+                    index_elements=[TemperatureSeriesInDB.room_name]
+                )
+            )
+            series_ids = dict((await self._session.execute(statement)).all())
+        return series_ids
+
+    async def create_many(self, temperatures: list[dict[str, Any]]) -> list[int]:
+        """Adds several temperatures to the database using a single bulk
+        insert (without loading them back as TemperatureInDB's)
 
         Args:
-            temperature (TemperatureInDB): Temperature to add to the database
+            temperatures (list[dict[str, Any]]): The timestamp, value and
+                                                 room_name of each temperature
+                                                 to add
+
+        Returns:
+            list[int]: IDs of the added temperatures (in the same order)
         """
+        if not temperatures:
+            return []
 
-        self._session.add(temperature)
-        self._session.commit()
-        self._session.refresh(temperature)
-        return temperature
+        series_ids = await self._get_series_ids(
+            temperature["room_name"] for temperature in temperatures
+        )
+        temperature_ids = await self._session.scalars(
+            insert(TemperatureInDB).returning(
+                TemperatureInDB.id, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    "timestamp": temperature["timestamp"],
+                    "value": temperature["value"],
+                    "series_id": series_ids[temperature["room_name"]],
+                }
+                for temperature in temperatures
+            ],
+        )
+        await self.update_rollups(temperatures)
+        return list(temperature_ids)
 
-    def get_all(
+    def _summarise(
+        self,
+        temperatures: Iterable[Mapping[str, Any]],
+        bucket_size: int,
+        rollups: Optional[dict[tuple[str, datetime], dict[str, Any]]] = None,
+    ) -> dict[tuple[str, datetime], dict[str, Any]]:
+        """Returns rollup rows summarising some temperatures (one per room
+        and bucket, keyed by both)
+
+        Args:
+            temperatures (Iterable[Mapping[str, Any]]): The timestamp, value
+                and room_name of each temperature to summarise
+            bucket_size (int): Number of seconds each rollup covers
+            rollups (Optional[dict[tuple[str, datetime], dict[str, Any]]]):
+                Existing rollups to add the temperatures to (modified in
+                place)
+        """
+        if rollups is None:
+            rollups = {}
+        for temperature in temperatures:
+            timestamp = temperature["timestamp"]
+            value = temperature["value"]
+            bucket = get_bucket_start(timestamp, bucket_size)
+            rollup = rollups.get((temperature["room_name"], bucket))
+            if rollup is None:
+                rollups[(temperature["room_name"], bucket)] = {
+                    "room_name": temperature["room_name"],
+                    "timestamp": bucket,
+                    "min_value": value,
+                    "max_value": value,
+                    "total": value,
+                    "count": 1,
+                    "last_value": value,
+                    "last_timestamp": timestamp,
+                }
+            else:
+                rollup["min_value"] = min(rollup["min_value"], value)
+                rollup["max_value"] = max(rollup["max_value"], value)
+                rollup["total"] += value
+                rollup["count"] += 1
+                if timestamp >= rollup["last_timestamp"]:
+                    rollup["last_value"] = value
+                    rollup["last_timestamp"] = timestamp
+        return rollups
+
+    async def update_rollups(self, temperatures: list[dict[str, Any]]) -> None:
+        """Adds some temperatures to the rollup tables (inserting or merging
+        into the existing rows for the same room and interval)
+
+        Args:
+            temperatures (list[dict[str, Any]]): The timestamp, value and
+                                                 room_name of each temperature
+                                                 to add
+        """
+        if not temperatures:
+            return
+
+        for bucket_size, model in ROLLUP_MODELS.items():
+            rollups = list(self._summarise(temperatures, bucket_size).values())
+            for start in range(0, len(rollups), ROLLUP_UPSERT_CHUNK_SIZE):
+                await self._upsert_rollups(
+                    model, rollups[start : start + ROLLUP_UPSERT_CHUNK_SIZE]
+                )
+
+    async def _upsert_rollups(
+        self, model: Type[TemperatureRollupMixin], rollups: list[dict[str, Any]]
+    ) -> None:
+        """Inserts rollups or merges them into the existing rows for the same
+        room and interval (see update_rollups)"""
+        if self._session.bind.dialect.name == "sqlite":
+            least, greatest = func.min, func.max
+        else:
+            least, greatest = func.least, func.greatest
+
+        statement = self._insert(model).values(rollups)
+        excluded = statement.excluded
+        await self._session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[model.room_name, model.timestamp],
+                set_={
+                    "min_value": least(model.min_value, excluded.min_value),
+                    "max_value": greatest(model.max_value, excluded.max_value),
+                    "total": model.total + excluded.total,
+                    "count": model.count + excluded.count,
+                    "last_value": case(
+                        (
+                            excluded.last_timestamp >= model.last_timestamp,
+                            excluded.last_value,
+                        ),
+                        else_=model.last_value,
+                    ),
+                    "last_timestamp": greatest(
+                        model.last_timestamp, excluded.last_timestamp
+                    ),
+                },
+            )
+        )
+
+    async def rebuild_rollups(self, chunk_size: int = 10000) -> int:
+        """Replaces the rollups of the recorded temperatures with a summary of
+        them
+
+        Only rollups from the bucket of the earliest remaining temperature
+        onwards are replaced. Older rollups are the only history left of
+        temperatures that have been purged, so are kept as they are. So is
+        the rollup of that first bucket in a room when it counts more
+        temperatures than remain in it (as some of them have been purged).
+
+        Args:
+            chunk_size (int): Number of rows to read or write at a time
+
+        Returns:
+            int: Number of temperatures summarised
+        """
+        earliest = await self._session.scalar(
+            select(func.min(TemperatureInDB.timestamp))
+        )
+        if earliest is None:
+            return 0
+
+        # Summarise everything before writing, as the rollups are much smaller
+        # than the temperatures and this avoids writing while streaming
+        rollups = {bucket_size: {} for bucket_size in ROLLUP_MODELS}
+        count = 0
+        async for rows in self.stream_all(chunk_size=chunk_size):
+            for bucket_size in ROLLUP_MODELS:
+                self._summarise(
+                    [row._mapping for row in rows], bucket_size, rollups[bucket_size]
+                )
+            count += len(rows)
+
+        for bucket_size, model in ROLLUP_MODELS.items():
+            first_bucket = get_bucket_start(earliest, bucket_size)
+            first_counts = dict(
+                (
+                    await self._session.execute(
+                        select(model.room_name, model.count).where(
+                            model.timestamp == first_bucket
+                        )
+                    )
+                ).all()
+            )
+            # Rooms whose first rollup includes purged temperatures
+            kept_room_names = []
+            for room_name, rollup_count in first_counts.items():
+                rollup = rollups[bucket_size].get((room_name, first_bucket))
+                if rollup_count > (rollup["count"] if rollup is not None else 0):
+                    kept_room_names.append(room_name)
+
+            statement = delete(model).where(model.timestamp >= first_bucket)
+            if kept_room_names:
+                statement = statement.where(
+                    ~and_(
+                        model.timestamp == first_bucket,
+                        model.room_name.in_(kept_room_names),
+                    )
+                )
+            await self._session.execute(statement)
+            values = [
+                rollup
+                for (room_name, bucket), rollup in rollups[bucket_size].items()
+                if bucket != first_bucket or room_name not in kept_room_names
+            ]
+            for start in range(0, len(values), chunk_size):
+                await self._session.execute(
+                    insert(model), values[start : start + chunk_size]
+                )
+        return count
+
+    async def count_uncovered_rollups(self, time: datetime) -> int:
+        """Returns the number of rollups that are missing or don't yet include
+        every temperature recorded before a particular time (so those
+        temperatures can't be deleted without losing history)
+
+        Args:
+            time (datetime): Time before which temperatures would be deleted
+
+        Returns:
+            int: Number of missing or incomplete rollups
+        """
+        epoch = self._get_epoch(TemperatureInDB.timestamp)
+        uncovered = 0
+        for bucket_size, model in ROLLUP_MODELS.items():
+            bucket = (epoch // bucket_size) * bucket_size
+            # Number of temperatures in each room and bucket (usually far
+            # fewer than the temperatures themselves)
+            counts = {
+                (room_name, EPOCH + timedelta(seconds=bucket_start)): count
+                for room_name, bucket_start, count in await self._session.execute(
+                    self._select_temperatures(
+                        TemperatureSeriesInDB.room_name, bucket, func.count()
+                    )
+                    .where(TemperatureInDB.timestamp < time)
+                    .group_by(TemperatureSeriesInDB.room_name, bucket)
+                )
+            }
+            if not counts:
+                continue
+
+            rollup_counts = {
+                (room_name, timestamp): count
+                for room_name, timestamp, count in await self._session.execute(
+                    select(model.room_name, model.timestamp, model.count).where(
+                        model.timestamp >= min(key[1] for key in counts),
+                        model.timestamp < time,
+                    )
+                )
+            }
+            # Rollups also count temperatures that have already been deleted,
+            # so may have more
+            uncovered += sum(
+                1
+                for key, count in counts.items()
+                if rollup_counts.get(key, 0) < count
+            )
+        return uncovered
+
+    async def get_earliest_rollup_timestamp(
         self,
-        room_name: Optional[str] = None,
         start_timestamp: Optional[datetime] = None,
         end_timestamp: Optional[datetime] = None,
-    ) -> list[TemperatureInDB]:
-        """Returns a list of temperatures with several optional query params"""
+        room_names: Optional[list[str]] = None,
+    ) -> Optional[datetime]:
+        """Returns the start of the earliest hourly rollup starting within the
+        given times (which may be before the earliest temperature if older
+        ones have been deleted)
+
+        Args:
+            start_timestamp (Optional[datetime]): Time to look from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to look up to
+                                                (exclusive)
+            room_names (Optional[list[str]]): Names of the rooms to look at
+
+        Returns:
+            Optional[datetime]: Start of the earliest rollup (if any)
+        """
+        model = ROLLUP_MODELS[3600]
+        return await self._session.scalar(
+            select(func.min(model.timestamp)).where(
+                *self._get_filters(
+                    None,
+                    start_timestamp,
+                    end_timestamp,
+                    room_names=room_names,
+                    model=model,
+                )
+            )
+        )
+
+    async def delete_before(self, time: datetime, limit: Optional[int] = None) -> int:
+        """Deletes temperatures recorded before a particular time (leaving
+        the rollups untouched)
+
+        Args:
+            time (datetime): Time before which temperatures should be deleted
+            limit (Optional[int]): Maximum number of temperatures to delete (so
+                                   large deletes can be done in batches)
+
+        Returns:
+            int: Number of rows deleted
+        """
+        statement = delete(TemperatureInDB)
+        if limit is None:
+            statement = statement.where(TemperatureInDB.timestamp < time)
+        else:
+            statement = statement.where(
+                TemperatureInDB.id.in_(
+                    select(TemperatureInDB.id)
+                    .where(TemperatureInDB.timestamp < time)
+                    .limit(limit)
+                )
+            )
+        result = await self._session.execute(
+            statement, execution_options={"synchronize_session": False}
+        )
+        return result.rowcount
+
+    def _get_filters(
+        self,
+        room_name: Optional[str],
+        start_timestamp: Optional[datetime],
+        end_timestamp: Optional[datetime],
+        room_names: Optional[list[str]] = None,
+        model: Union[Type[TemperatureInDB], Type[TemperatureRollupMixin]] = (
+            TemperatureInDB
+        ),
+    ) -> list:
+        """Returns the filters to apply to a query for temperatures (or
+        rollups)"""
         filters = []
         if room_name is not None:
-            filters.append(TemperatureInDB.room_name == room_name)
+            if model is TemperatureInDB:
+                # Filter on the series directly so its index can be used
+                filters.append(
+                    TemperatureInDB.series_id
+                    == select(TemperatureSeriesInDB.id)
+                    .where(TemperatureSeriesInDB.room_name == room_name)
+                    .scalar_subquery()
+                )
+            else:
+                filters.append(model.room_name == room_name)
+        if room_names is not None:
+            if model is TemperatureInDB:
+                filters.append(
+                    TemperatureInDB.series_id.in_(
+                        select(TemperatureSeriesInDB.id).where(
+                            TemperatureSeriesInDB.room_name.in_(room_names)
+                        )
+                    )
+                )
+            else:
+                filters.append(model.room_name.in_(room_names))
         if start_timestamp is not None:
-            filters.append(TemperatureInDB.timestamp >= start_timestamp)
+            filters.append(model.timestamp >= start_timestamp)
         if end_timestamp is not None:
-            filters.append(TemperatureInDB.timestamp < end_timestamp)
+            filters.append(model.timestamp < end_timestamp)
+        return filters
+
+    def _select_temperatures(self, *columns):
+        """Returns a select statement for temperatures joined with their
+        series (selecting the id, timestamp, value and room_name when no
+        columns are given)"""
+        if not columns:
+            columns = (
+                TemperatureInDB.id,
+                TemperatureInDB.timestamp,
+                TemperatureInDB.value,
+                TemperatureSeriesInDB.room_name,
+            )
+        return select(*columns).join(
+            TemperatureSeriesInDB,
+            TemperatureSeriesInDB.id == TemperatureInDB.series_id,
+        )
+
+    def _get_epoch(self, timestamp):
+        """Returns an expression giving a timestamp column as a whole number
+        of seconds since the epoch (computed in the database)"""
+        if self._session.bind.dialect.name == "sqlite":
+            return cast(func.strftime("%s", timestamp), BigInteger)
+        return cast(func.floor(extract("epoch", timestamp)), BigInteger)
+
+    async def get_all(
+        self,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        bucket_size: Optional[int] = None,
+        aggregate: TemperatureAggregate = TemperatureAggregate.AVG,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
+        room_names: Optional[list[str]] = None,
+    ) -> list[Row]:
+        """Returns a list of temperatures with several optional query params
+
+        Args:
+            room_name (Optional[str]): Name of the room to return
+            start_timestamp (Optional[datetime]): Time to return from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to return up to
+                                                (exclusive)
+            bucket_size (Optional[int]): When given, temperatures of each
+                                         room are grouped into buckets of
+                                         this many seconds (aligned to the
+                                         epoch) in the database. Hourly and
+                                         daily buckets are read from the
+                                         rollup tables, so only include
+                                         whole buckets starting within the
+                                         given times.
+            aggregate (TemperatureAggregate): How to combine the temperatures
+                                              in each bucket
+            after (Optional[tuple[datetime, int]]): Only return temperatures
+                after the one with this timestamp and id (for paging through
+                the results without having to skip over previous pages, not
+                supported when bucketing)
+            limit (Optional[int]): Maximum number of temperatures to return
+                                   (not supported when bucketing)
+            room_names (Optional[list[str]]): Names of the rooms to return
+                                              (in a single query)
 
-        if len(filters) == 0:
-            return (
-                self._session.query(TemperatureInDB)
-                .order_by(TemperatureInDB.timestamp)
-                .all()
+        Returns:
+            list[Row]: The id, timestamp, value and room_name of each
+                temperature ordered by timestamp (then id). When bucketed, each row
+                instead contains the timestamp (start of the bucket in seconds
+                since the epoch), value and room_name of a bucket.
+        """
+        if bucket_size in ROLLUP_MODELS:
+            return await self._get_all_rollups(
+                self._get_filters(
+                    room_name,
+                    start_timestamp,
+                    end_timestamp,
+                    room_names=room_names,
+                    model=ROLLUP_MODELS[bucket_size],
+                ),
+                ROLLUP_MODELS[bucket_size],
+                aggregate,
+            )
+
+        filters = self._get_filters(
+            room_name, start_timestamp, end_timestamp, room_names=room_names
+        )
+
+        if bucket_size is not None:
+            return await self._get_all_bucketed(filters, bucket_size, aggregate)
+
+        if after is not None:
+            filters.extend(
+                [
+                    # Allows a range scan of the timestamp in the indices
+                    TemperatureInDB.timestamp >= after[0],
+                    tuple_(TemperatureInDB.timestamp, TemperatureInDB.id)
+                    > tuple_(*after),
+                ]
+            )
+
+        return list(
+            await self._session.execute(
+                self._select_temperatures()
+                .order_by(TemperatureInDB.timestamp, TemperatureInDB.id)
+                .where(*filters)
+                .limit(limit)
+            )
+        )
+
+    async def _get_all_bucketed(
+        self, filters: list, bucket_size: int, aggregate: TemperatureAggregate
+    ) -> list[Row]:
+        """Returns temperatures grouped into buckets (see get_all)"""
+        epoch = self._get_epoch(TemperatureInDB.timestamp)
+        bucket = (epoch // bucket_size) * bucket_size
+
+        if aggregate == TemperatureAggregate.LAST:
+            # Number the temperatures in each bucket from the latest and keep
+            # only the first
+            numbered = (
+                self._select_temperatures(
+                    bucket.label("timestamp"),
+                    TemperatureInDB.value,
+                    TemperatureSeriesInDB.room_name,
+                    func.row_number()
+                    .over(
+                        partition_by=(TemperatureInDB.series_id, bucket),
+                        order_by=TemperatureInDB.timestamp.desc(),
+                    )
+                    .label("row_number"),
+                )
+                .where(*filters)
+                .subquery()
+            )
+            statement = (
+                select(numbered.c.timestamp, numbered.c.value, numbered.c.room_name)
+                .where(numbered.c.row_number == 1)
+                .order_by(numbered.c.timestamp, numbered.c.room_name)
             )
         else:
-            return (
-                self._session.query(TemperatureInDB)
-                .order_by(TemperatureInDB.timestamp)
-                .filter(*filters)
-                .all()
+            aggregate_function = {
+                TemperatureAggregate.AVG: func.avg,
+                TemperatureAggregate.MIN: func.min,
+                TemperatureAggregate.MAX: func.max,
+            }[aggregate]
+            bucket = bucket.label("timestamp")
+            statement = (
+                self._select_temperatures(
+                    bucket,
+                    aggregate_function(TemperatureInDB.value).label("value"),
+                    TemperatureSeriesInDB.room_name,
+                )
+                .where(*filters)
+                .group_by(TemperatureSeriesInDB.room_name, bucket)
+                .order_by(bucket, TemperatureSeriesInDB.room_name)
             )
+
+        return list(await self._session.execute(statement))
+
+    async def _get_all_rollups(
+        self,
+        filters: list,
+        model: Type[TemperatureRollupMixin],
+        aggregate: TemperatureAggregate,
+    ) -> list[Row]:
+        """Returns temperatures grouped into buckets from a rollup table (see
+        get_all)"""
+        value = {
+            TemperatureAggregate.AVG: model.total / model.count,
+            TemperatureAggregate.MIN: model.min_value,
+            TemperatureAggregate.MAX: model.max_value,
+            TemperatureAggregate.LAST: model.last_value,
+        }[aggregate]
+        return list(
+            await self._session.execute(
+                select(
+                    self._get_epoch(model.timestamp).label("timestamp"),
+                    value.label("value"),
+                    model.room_name,
+                )
+                .where(*filters)
+                .order_by(model.timestamp, model.room_name)
+            )
+        )
+
+    async def stream_all(
+        self,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        chunk_size: int = 1000,
+        room_names: Optional[list[str]] = None,
+    ) -> AsyncGenerator[list[Row], None]:
+        """Returns the same temperatures as get_all, but fetched in chunks
+        using a server side cursor so they don't all need to be held in memory
+
+        Yields:
+            list[Row]: Next chunk of at most chunk_size rows, each containing
+                       the id, timestamp, value and room_name of a temperature
+        """
+        filters = self._get_filters(
+            room_name, start_timestamp, end_timestamp, room_names=room_names
+        )
+
+        result = await self._session.stream(
+            self._select_temperatures()
+            .order_by(TemperatureInDB.timestamp)
+            .where(*filters)
+            .execution_options(yield_per=chunk_size)
+        )
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
@@ -1,27 +1,28 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from homecontrol_base.database.core import DatabaseConnection
 from homecontrol_base.exceptions import DatabaseEntryNotFoundError
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from homecontrol_api.database.models import UserSessionInDB
+from homecontrol_api.database.core import AsyncDatabaseConnection
+from homecontrol_api.database.models import UserInDB, UserSessionInDB
 
 
-class UserSessionsDBConnection(DatabaseConnection):
+class UserSessionsDBConnection(AsyncDatabaseConnection):
     """Handles UserInDB's in the database"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    def create(self, user_session: UserSessionInDB) -> UserSessionInDB:
+    async def create(self, user_session: UserSessionInDB) -> UserSessionInDB:
         """Adds a UserSessionInDB to the database"""
         self._session.add(user_session)
-        self._session.commit()
-        self._session.refresh(user_session)
+        await self._session.flush()
         return user_session
 
-    def get(self, user_session_id: str) -> UserSessionInDB:
+    async def get(self, user_session_id: str) -> UserSessionInDB:
         """Returns UserSessionInDB given a user's ID
 
         Args:
@@ -34,27 +35,51 @@ class UserSessionsDBConnection(DatabaseConnection):
             DatabaseEntryNotFoundError: If the user isn't found
         """
 
-        user_session = (
-            self._session.query(UserSessionInDB)
-            .filter(UserSessionInDB.id == UUID(user_session_id))
-            .first()
-        )
+        user_session = await self._session.get(UserSessionInDB, UUID(user_session_id))
         if not user_session:
             raise DatabaseEntryNotFoundError(
                 f"User session with id '{user_session_id}' was not found"
             )
         return user_session
 
-    def get_all(self) -> list[UserSessionInDB]:
+    async def get_with_user(
+        self, user_session_id: str
+    ) -> tuple[UserSessionInDB, UserInDB]:
+        """Returns UserSessionInDB and the UserInDB it belongs to given a
+        session's ID (using a single query)
+
+        Args:
+            user_session_id (str): ID of the user session
+
+        Returns:
+            tuple[UserSessionInDB, UserInDB]: The session and its user
+
+        Raises:
+            DatabaseEntryNotFoundError: If the session or its user isn't found
+        """
+
+        result = (
+            await self._session.execute(
+                select(UserSessionInDB, UserInDB)
+                .join(UserInDB, UserInDB.id == UserSessionInDB.user_id)
+                .where(UserSessionInDB.id == UUID(user_session_id))
+            )
+        ).first()
+        if not result:
+            raise DatabaseEntryNotFoundError(
+                f"User session with id '{user_session_id}' was not found"
+            )
+        return result.tuple()
+
+    async def get_all(self) -> list[UserSessionInDB]:
         """Returns a list of information about all user session"""
-        return self._session.query(UserSessionInDB).all()
+        return list(await self._session.scalars(select(UserSessionInDB)))
 
-    def update(self, user_session: UserSessionInDB) -> None:
-        """Commits changes that have already been assigned to a user session"""
-        self._session.commit()
-        self._session.refresh(user_session)
+    async def update(self, user_session: UserSessionInDB) -> None:
+        """Flushes changes that have already been assigned to a user session"""
+        await self._session.flush()
 
-    def delete(self, user_session_id: str):
+    async def delete(self, user_session_id: str):
         """Deletes a UserSessionInDB given the users's id
 
         Args:
@@ -63,32 +88,54 @@ class UserSessionsDBConnection(DatabaseConnection):
         Raises:
             DatabaseEntryNotFoundError: If the user isn't found
         """
-        rows_deleted = (
-            self._session.query(UserSessionInDB)
-            .filter(UserSessionInDB.id == UUID(user_session_id))
-            .delete()
+        result = await self._session.execute(
+            delete(UserSessionInDB).where(UserSessionInDB.id == UUID(user_session_id))
         )
 
-        if rows_deleted == 0:
+        if result.rowcount == 0:
             raise DatabaseEntryNotFoundError(
                 f"User session with id '{user_session_id}' was not found"
             )
 
-        self._session.commit()
+    async def delete_all_for_user(self, user_id: str) -> int:
+        """Deletes all sessions belonging to a user
 
-    def delete_sessions_expired_before(self, time: datetime) -> int:
+        Args:
+            user_id (str): ID of the user
+
+        Returns:
+            int: Number of rows deleted
+        """
+        result = await self._session.execute(
+            delete(UserSessionInDB).where(UserSessionInDB.user_id == UUID(user_id))
+        )
+        return result.rowcount
+
+    async def delete_sessions_expired_before(
+        self, time: datetime, limit: Optional[int] = None
+    ) -> int:
         """Delete's all sessions that expired before a particular time
 
         Args:
             time (datetime): Time before which sessions should be deleted
+            limit (Optional[int]): Maximum number of sessions to delete (so
+                                   large deletes can be done in chunks)
 
         Returns:
             int: Number of rows deleted
         """
-        rows_deleted = (
-            self._session.query(UserSessionInDB)
-            .filter(UserSessionInDB.expiry_time < time)
-            .delete()
+        statement = delete(UserSessionInDB)
+        if limit is None:
+            statement = statement.where(UserSessionInDB.expiry_time < time)
+        else:
+            statement = statement.where(
+                UserSessionInDB.id.in_(
+                    select(UserSessionInDB.id)
+                    .where(UserSessionInDB.expiry_time < time)
+                    .limit(limit)
+                )
+            )
+        result = await self._session.execute(
+            statement, execution_options={"synchronize_session": False}
         )
-        self._session.commit()
-        return rows_deleted
+        return result.rowcount
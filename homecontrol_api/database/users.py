@@ -1,23 +1,24 @@
 from uuid import UUID
 
-from homecontrol_base.database.core import DatabaseConnection
 from homecontrol_base.exceptions import (
     DatabaseEntryNotFoundError,
     DatabaseDuplicateEntryFoundError,
 )
+from sqlalchemy import delete, func, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from homecontrol_api.database.core import AsyncDatabaseConnection
 from homecontrol_api.database.models import UserInDB
 
 
-class UsersDBConnection(DatabaseConnection):
+class UsersDBConnection(AsyncDatabaseConnection):
     """Handles UserInDB's in the database"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(session)
 
-    def create(self, user: UserInDB) -> UserInDB:
+    async def create(self, user: UserInDB) -> UserInDB:
         """Adds a UserInDB to the database
 
         Args:
@@ -27,19 +28,17 @@ class UsersDBConnection(DatabaseConnection):
             DatabaseDuplicateEntryFoundError: If a user with the same username
                                             is already present in the database
         """
-        self._session.add(user)
-
         try:
-            self._session.commit()
+            # Use a savepoint so only this insert is undone on failure
+            async with self._session.begin_nested():
+                self._session.add(user)
         except IntegrityError as exc:
-            self._session.rollback()
             raise DatabaseDuplicateEntryFoundError(
                 f"User with the username '{user.username}' already exists"
             ) from exc
-        self._session.refresh(user)
         return user
 
-    def get(self, user_id: str) -> UserInDB:
+    async def get(self, user_id: str) -> UserInDB:
         """Returns UserInDB given a user's ID
 
         Args:
@@ -52,14 +51,12 @@ class UsersDBConnection(DatabaseConnection):
             DatabaseEntryNotFoundError: If the user isn't found
         """
 
-        user = (
-            self._session.query(UserInDB).filter(UserInDB.id == UUID(user_id)).first()
-        )
+        user = await self._session.get(UserInDB, UUID(user_id))
         if not user:
             raise DatabaseEntryNotFoundError(f"User with id '{user_id}' was not found")
         return user
 
-    def get_by_username(self, username: str) -> UserInDB:
+    async def get_by_username(self, username: str) -> UserInDB:
         """Returns UserInDB given a user's username
 
         Args:
@@ -71,8 +68,8 @@ class UsersDBConnection(DatabaseConnection):
         Raises:
             DatabaseEntryNotFoundError: If the user isn't found
         """
-        user = (
-            self._session.query(UserInDB).filter(UserInDB.username == username).first()
+        user = await self._session.scalar(
+            select(UserInDB).where(UserInDB.username == username)
         )
         if not user:
             raise DatabaseEntryNotFoundError(
@@ -80,20 +77,19 @@ class UsersDBConnection(DatabaseConnection):
             )
         return user
 
-    def get_all(self) -> list[UserInDB]:
+    async def get_all(self) -> list[UserInDB]:
         """Returns a list of information about all users"""
-        return self._session.query(UserInDB).all()
+        return list(await self._session.scalars(select(UserInDB)))
 
-    def count(self) -> int:
+    async def count(self) -> int:
         """Returns the number of users in the database"""
-        return self._session.query(UserInDB).count()
+        return await self._session.scalar(select(func.count()).select_from(UserInDB))
 
-    def update(self, user: UserInDB) -> None:
-        """Commits changes that have already been assigned to a user"""
-        self._session.commit()
-        self._session.refresh(user)
+    async def update(self, user: UserInDB) -> None:
+        """Flushes changes that have already been assigned to a user"""
+        await self._session.flush()
 
-    def delete(self, user_id: str):
+    async def delete(self, user_id: str):
         """Deletes a UserInDB given the user's id
 
         Args:
@@ -102,11 +98,9 @@ class UsersDBConnection(DatabaseConnection):
         Raises:
             DatabaseEntryNotFoundError: If the user isn't found
         """
-        rows_deleted = (
-            self._session.query(UserInDB).filter(UserInDB.id == UUID(user_id)).delete()
+        result = await self._session.execute(
+            delete(UserInDB).where(UserInDB.id == UUID(user_id))
         )
 
-        if rows_deleted == 0:
+        if result.rowcount == 0:
             raise DatabaseEntryNotFoundError(f"User with id '{user_id}' was not found")
-
-        self._session.commit()
@@ -11,6 +11,12 @@ class APIError(Exception):
         super().__init__(message)
 
 
+class InvalidParametersError(APIError):
+    """Raised when a request's parameters are invalid or can't be used together"""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
 class AuthenticationError(APIError):
     """Raised when authentication fails"""
 
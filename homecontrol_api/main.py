@@ -10,7 +10,15 @@ from homecontrol_base.broadlink.manager import BroadlinkManager
 from homecontrol_base.hue.manager import HueManager
 import uvicorn
 
-from homecontrol_api.config.api import APIConfig
+from homecontrol_api.authentication.security import (
+    calibrate_password_hashing,
+    configure_password_hashing,
+    shutdown_password_hashing,
+)
+from homecontrol_api.authentication.sweeper import ExpiredSessionSweeper
+from homecontrol_api.authentication.throttle import configure_login_throttle
+from homecontrol_api.config.api import get_api_config, get_api_config_reload_count
+from homecontrol_api.database.core import count_statements
 from homecontrol_api.exceptions import APIError
 from homecontrol_api.routers.actions.broadlink import broadlink_actions
 from homecontrol_api.routers.actions.room import room_actions
@@ -22,17 +30,39 @@ from homecontrol_api.routers.rooms import rooms
 from homecontrol_api.routers.scheduler import scheduler
 from homecontrol_api.routers.temperature import temperature
 from homecontrol_api.scheduler.core import Scheduler
-from homecontrol_api.service.homecontrol_api import create_homecontrol_api_service
+from homecontrol_api.temperature.buffer import (
+    configure_temperature_buffer,
+    get_temperature_buffer,
+)
+from homecontrol_api.temperature.statistics import (
+    configure_temperature_statistics,
+    shutdown_temperature_statistics,
+)
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app_instance: FastAPI):
-    """Used to setup the database, delete expired sessions and initialise
-    devices when starting"""
-
-    # Delete any expired user sessions
-    with create_homecontrol_api_service() as service:
-        service.auth.delete_all_expired_sessions()
+    """Used to setup the database, start deleting expired sessions, load
+    recent temperatures and initialise devices when starting"""
+
+    # Run bcrypt on a bounded thread pool so logins don't block other requests
+    configure_password_hashing(api_config.security.password_hashing_workers)
+    if api_config.security.password_hashing_target_time is not None:
+        calibrate_password_hashing(api_config.security.password_hashing_target_time)
+    configure_login_throttle(api_config.security.login_throttle)
+    # Compute temperature statistics on separate processes
+    configure_temperature_statistics(api_config.temperature.statistics_workers)
+
+    # Delete any expired user sessions, and keep doing so periodically
+    app_instance.state.session_sweeper = ExpiredSessionSweeper()
+    await app_instance.state.session_sweeper.sweep()
+    app_instance.state.session_sweeper.start()
+
+    # Keep recent temperatures in memory (before any more can be recorded)
+    configure_temperature_buffer(api_config.temperature)
+    await get_temperature_buffer().load()
 
     # Load and add managers (keeps devices in memory to keep authentication
     # - specifically needed for Midea AC units as the authentication takes
@@ -51,9 +81,12 @@ async def lifespan(app_instance: FastAPI):
     yield
 
     app_instance.state.scheduler.stop()
+    await app_instance.state.session_sweeper.stop()
+    shutdown_password_hashing()
+    shutdown_temperature_statistics()
 
 
-api_config = APIConfig()
+api_config = get_api_config()
 
 app = FastAPI(
     lifespan=lifespan,
@@ -61,6 +94,32 @@ app = FastAPI(
     root_path=api_config.root_path,
 )
 
+
+class StatementCountMiddleware:
+    """Logs the number of database statements executed by each request (at
+    debug level)"""
+
+    def __init__(self, app_instance):
+        self._app = app_instance
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not logger.isEnabledFor(logging.DEBUG):
+            await self._app(scope, receive, send)
+            return
+
+        with count_statements() as counter:
+            try:
+                await self._app(scope, receive, send)
+            finally:
+                logger.debug(
+                    "%s %s executed %d database statements",
+                    scope["method"],
+                    scope["path"],
+                    counter.count,
+                )
+
+
+app.add_middleware(StatementCountMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=api_config.security.cors_allow_origins,
@@ -95,5 +154,7 @@ async def get_info() -> dict:
         "version": {
             "homecontrol_base": version("homecontrol-base"),
             "homecontrol_api": version("homecontrol-api"),
-        }
+        },
+        "config": {"reload_count": get_api_config_reload_count()},
+        "temperature_buffer": get_temperature_buffer().get_stats(),
     }
@@ -0,0 +1,207 @@
+"""Compact temperatures schema
+
+Revision ID: b7d41c9e2f06
+Revises: 3c5e0b1f7a92
+Create Date: 2026-10-17 22:48:09.216734
+
+"""
+
+import uuid
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d41c9e2f06"
+down_revision: Union[str, None] = "3c5e0b1f7a92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Length of time copied between the tables in each batch
+BATCH_INTERVAL = timedelta(days=7)
+
+
+def copy_in_batches(insert_batch) -> None:
+    """Copies the temperatures to another table in batches covering
+    BATCH_INTERVAL each (in timestamp order)
+
+    Args:
+        insert_batch: Called with the connection and a statement's parameters
+                      giving the time range (start and end) to copy
+    """
+    conn = op.get_bind()
+    temperatures = sa.table("temperatures", sa.column("timestamp", sa.DateTime()))
+    start, end = conn.execute(
+        sa.select(
+            sa.func.min(temperatures.c.timestamp),
+            sa.func.max(temperatures.c.timestamp),
+        )
+    ).one()
+    while start is not None and start <= end:
+        insert_batch(conn, {"start": start, "end": start + BATCH_INTERVAL})
+        start += BATCH_INTERVAL
+
+
+def batch_text(sql: str) -> sa.TextClause:
+    """Returns a statement taking the time range of a batch as parameters"""
+    return sa.text(sql).bindparams(
+        sa.bindparam("start", type_=sa.DateTime()),
+        sa.bindparam("end", type_=sa.DateTime()),
+    )
+
+
+def rename_postgresql_objects(
+    old_table: str, constraints: Sequence[str], sequences: Sequence[str]
+) -> None:
+    """Renames the constraints and sequences PostgreSQL named after a table
+    before it was renamed to temperatures (as renaming a table leaves them
+    alone)
+
+    Args:
+        old_table (str): Name the table had when it was created
+        constraints (Sequence[str]): Suffixes of the constraints to rename
+        sequences (Sequence[str]): Suffixes of the sequences to rename
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for suffix in constraints:
+        op.execute(
+            f"ALTER TABLE temperatures RENAME CONSTRAINT {old_table}_{suffix} "
+            f"TO temperatures_{suffix}"
+        )
+    for suffix in sequences:
+        op.execute(
+            f"ALTER SEQUENCE {old_table}_{suffix} RENAME TO temperatures_{suffix}"
+        )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "temperature_series",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("room_name", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("room_name"),
+    )
+    op.create_table(
+        "temperatures_compact",
+        sa.Column(
+            "id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            nullable=False,
+        ),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("series_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["series_id"], ["temperature_series.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.execute(
+        "INSERT INTO temperature_series (room_name) "
+        "SELECT DISTINCT room_name FROM temperatures"
+    )
+
+    # Copy the existing temperatures a batch at a time, so ids are assigned
+    # in time order
+    def insert_batch(conn, params):
+        conn.execute(
+            batch_text(
+                "INSERT INTO temperatures_compact (timestamp, value, series_id) "
+                "SELECT t.timestamp, t.value, s.id FROM temperatures t "
+                "JOIN temperature_series s ON s.room_name = t.room_name "
+                "WHERE t.timestamp >= :start AND t.timestamp < :end "
+                "ORDER BY t.timestamp"
+            ),
+            params,
+        )
+
+    copy_in_batches(insert_batch)
+
+    with op.batch_alter_table("temperatures", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_temperatures_room_name"))
+        batch_op.drop_index(batch_op.f("ix_temperatures_timestamp"))
+    op.drop_table("temperatures")
+    op.rename_table("temperatures_compact", "temperatures")
+    rename_postgresql_objects(
+        "temperatures_compact", ["pkey", "series_id_fkey"], ["id_seq"]
+    )
+
+    with op.batch_alter_table("temperatures", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_temperatures_timestamp"), ["timestamp"], unique=False
+        )
+        batch_op.create_index(
+            "ix_temperatures_series_id_timestamp",
+            ["series_id", "timestamp"],
+            unique=False,
+            postgresql_include=["value", "id"],
+        )
+
+
+def downgrade() -> None:
+    op.create_table(
+        "temperatures_uuid",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("room_name", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    temperatures_uuid = sa.table(
+        "temperatures_uuid",
+        sa.column("id", sa.Uuid()),
+        sa.column("timestamp", sa.DateTime()),
+        sa.column("value", sa.Float()),
+        sa.column("room_name", sa.String()),
+    )
+
+    # UUIDs can't be generated in SQL portably, so each batch is copied
+    # through Python
+    def insert_batch(conn, params):
+        rows = conn.execute(
+            batch_text(
+                "SELECT t.timestamp, t.value, s.room_name FROM temperatures t "
+                "JOIN temperature_series s ON s.id = t.series_id "
+                "WHERE t.timestamp >= :start AND t.timestamp < :end"
+            ).columns(
+                sa.column("timestamp", sa.DateTime()),
+                sa.column("value", sa.Float()),
+                sa.column("room_name", sa.String()),
+            ),
+            params,
+        ).all()
+        if rows:
+            conn.execute(
+                sa.insert(temperatures_uuid),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "timestamp": row.timestamp,
+                        "value": row.value,
+                        "room_name": row.room_name,
+                    }
+                    for row in rows
+                ],
+            )
+
+    copy_in_batches(insert_batch)
+
+    with op.batch_alter_table("temperatures", schema=None) as batch_op:
+        batch_op.drop_index("ix_temperatures_series_id_timestamp")
+        batch_op.drop_index(batch_op.f("ix_temperatures_timestamp"))
+    op.drop_table("temperatures")
+    op.drop_table("temperature_series")
+    op.rename_table("temperatures_uuid", "temperatures")
+    rename_postgresql_objects("temperatures_uuid", ["pkey"], [])
+
+    with op.batch_alter_table("temperatures", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_temperatures_room_name"), ["room_name"], unique=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_temperatures_timestamp"), ["timestamp"], unique=False
+        )
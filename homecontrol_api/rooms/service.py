@@ -14,7 +14,7 @@ class RoomService(BaseService[HomeControlAPIDatabaseConnection]):
     def __init__(self, db_conn: HomeControlAPIDatabaseConnection) -> None:
         super().__init__(db_conn)
 
-    def create_room(self, room_info: RoomPost) -> Room:
+    async def create_room(self, room_info: RoomPost) -> Room:
         """Creates a room
 
         Args:
@@ -32,24 +32,26 @@ class RoomService(BaseService[HomeControlAPIDatabaseConnection]):
 
         # Add to the database
         try:
-            room = self.db_conn.rooms.create(room)
+            room = await self.db_conn.rooms.create(room)
         except DatabaseDuplicateEntryFoundError as exc:
             raise NameAlreadyExistsError(str(exc)) from exc
 
         # Return the created room
         return Room.model_validate(room)
 
-    def get_rooms(self) -> list[Room]:
+    async def get_rooms(self) -> list[Room]:
         """Returns a list of all available rooms"""
 
-        return TypeAdapter(list[Room]).validate_python(self.db_conn.rooms.get_all())
+        return TypeAdapter(list[Room]).validate_python(
+            await self.db_conn.rooms.get_all()
+        )
 
-    def get_room(self, room_id: str) -> Room:
+    async def get_room(self, room_id: str) -> Room:
         """Returns a room given its id"""
 
-        return Room.model_validate(self.db_conn.rooms.get(room_id))
+        return Room.model_validate(await self.db_conn.rooms.get(room_id))
 
-    def update_room(self, room_id: str, room_data: RoomPatch) -> Room:
+    async def update_room(self, room_id: str, room_data: RoomPatch) -> Room:
         """Updates a room
 
         Args:
@@ -58,7 +60,7 @@ class RoomService(BaseService[HomeControlAPIDatabaseConnection]):
         """
 
         # Obtain the room
-        room = self.db_conn.rooms.get(room_id)
+        room = await self.db_conn.rooms.get(room_id)
 
         # Assign the new data
         update_data = room_data.model_dump(exclude_unset=True)
@@ -66,13 +68,13 @@ class RoomService(BaseService[HomeControlAPIDatabaseConnection]):
             setattr(room, key, value)
 
         # Update and return the updated data
-        self.db_conn.rooms.update(room)
+        await self.db_conn.rooms.update(room)
         return Room.model_validate(room)
 
-    def delete_room(self, room_id: str) -> None:
+    async def delete_room(self, room_id: str) -> None:
         """Deletes a room
 
         Args:
             room_id (str): ID of the room to delete
         """
-        self.db_conn.rooms.delete(room_id)
+        await self.db_conn.rooms.delete(room_id)
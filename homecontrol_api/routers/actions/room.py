@@ -20,14 +20,14 @@ async def create_action(
 async def get_actions(
     user: AnyUser, api_service: APIService, room_id: Optional[UUIDString] = None
 ) -> list[RoomAction]:
-    return api_service.db_conn.room_actions.get_all(room_id=room_id)
+    return await api_service.db_conn.room_actions.get_all(room_id=room_id)
 
 
 @room_actions.patch(path="/{action_id}")
 async def update_action(
     action_id: str, action_data: RoomActionPatch, user: AnyUser, api_service: APIService
 ) -> RoomAction:
-    return api_service.action.update_room_action(action_id, action_data)
+    return await api_service.action.update_room_action(action_id, action_data)
 
 
 @room_actions.post(path="/{action_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -41,4 +41,4 @@ async def execute_action(
 async def delete_action(
     action_id: str, user: AdminUser, api_service: APIService
 ) -> None:
-    return api_service.action.delete_room_action(action_id)
+    return await api_service.action.delete_room_action(action_id)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Response, status
+from fastapi import APIRouter, Request, Response, status
 
 from homecontrol_api.authentication.schemas import (
     LoginPost,
@@ -27,14 +27,14 @@ async def get_user(user: AnyUser) -> User:
 
 @auth.post("/user", summary="Create user", status_code=status.HTTP_201_CREATED)
 async def create_user(user_info: UserPost, api_service: APIService) -> User:
-    return api_service.auth.create_user(user_info=user_info)
+    return await api_service.auth.create_user(user_info=user_info)
 
 
 @auth.patch("/user/{user_id}")
 async def patch_user(
     user_id: str, user_data: UserPatch, user: AdminUser, api_service: APIService
 ) -> User:
-    return api_service.auth.update_user(user_id=user_id, user_data=user_data)
+    return await api_service.auth.update_user(user_id=user_id, user_data=user_data)
 
 
 @auth.delete("/user/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -42,26 +42,41 @@ async def delete_user(user_id: str, user: AnyUser, api_service: APIService):
     # Only allow an admin to delete users that are not themselves
     if user.id != user_id and user.account_type != UserAccountType.ADMIN:
         raise InsufficientCredentialsError("Insufficient credentials")
-    return api_service.auth.delete_user(user_id)
+    return await api_service.auth.delete_user(user_id)
+
+
+@auth.delete(
+    "/user/{user_id}/sessions",
+    summary="Invalidate all sessions of a user",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_user_sessions(
+    user_id: str, user: AdminUser, api_service: APIService
+) -> None:
+    await api_service.auth.revoke_user_sessions(user_id)
 
 
 @auth.get("/users", summary="Obtain a list of all users")
 async def get_users(user: AdminUser, api_service: APIService) -> list[User]:
-    return api_service.auth.db_conn.users.get_all()
+    return await api_service.auth.db_conn.users.get_all()
 
 
 @auth.post("/login", summary="Login as a user")
 async def login(
-    login_info: LoginPost, response: Response, api_service: APIService
+    login_info: LoginPost, request: Request, response: Response, api_service: APIService
 ) -> UserSession:
-    return api_service.auth.login(login_info=login_info, response=response)
+    return await api_service.auth.login(
+        login_info=login_info,
+        response=response,
+        client_host=request.client.host if request.client else None,
+    )
 
 
 @auth.post("/refresh", summary="Refresh a user session")
 async def refresh(
     refresh_token: RefreshToken, response: Response, api_service: APIService
 ) -> UserSession:
-    return api_service.auth.refresh_user_session(
+    return await api_service.auth.refresh_user_session(
         refresh_token=refresh_token, response=response
     )
 
@@ -74,4 +89,4 @@ async def refresh(
 async def logout(
     current_session: AnySession, response: Response, api_service: APIService
 ) -> None:
-    api_service.auth.logout(user_session_id=current_session.id, response=response)
+    await api_service.auth.logout(user_session_id=current_session.id, response=response)
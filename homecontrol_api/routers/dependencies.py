@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Annotated
 
 from fastapi import Cookie, Depends, Header, Request
@@ -7,39 +8,44 @@ from homecontrol_base.service.homecontrol_base import (
 )
 
 from homecontrol_api.authentication.schemas import User, UserAccountType, UserSession
-from homecontrol_api.database.database import database as homecontrol_api_db
 from homecontrol_api.exceptions import AuthenticationError, InsufficientCredentialsError
-from homecontrol_api.service.homecontrol_api import HomeControlAPIService
-
+from homecontrol_api.service.homecontrol_api import (
+    HomeControlAPIService,
+    create_homecontrol_api_service,
+)
 
-async def get_homecontrol_base_service(
-    request: Request,
-) -> HomeControlBaseService:
-    """Constructs a base service using device managers loaded with the app"""
 
-    with create_homecontrol_base_service(
-        ac_manager=request.app.state.ac_manager,
-        hue_manager=request.app.state.hue_manager,
-        broadlink_manager=request.app.state.broadlink_manager,
+async def get_homecontrol_api_service(request: Request) -> HomeControlAPIService:
+    """Creates an instance of HomeControlAPIService (for use in FastAPI)
+
+    Its database connection and base service (using device managers loaded
+    with the app) are only opened if used during the request
+    """
+    async with create_homecontrol_api_service(
+        base_service_factory=partial(
+            create_homecontrol_base_service,
+            ac_manager=request.app.state.ac_manager,
+            hue_manager=request.app.state.hue_manager,
+            broadlink_manager=request.app.state.broadlink_manager,
+        ),
+        scheduler=request.app.state.scheduler,
     ) as service:
         yield service
 
 
-# BaseService from homecontrol-base
-BaseService = Annotated[HomeControlBaseService, Depends(get_homecontrol_base_service)]
+# APIService from homecontrol-api
+APIService = Annotated[HomeControlAPIService, Depends(get_homecontrol_api_service)]
 
 
-async def get_homecontrol_api_service(
-    request: Request,
-    base_service: BaseService,
-) -> HomeControlAPIService:
-    """Creates an instance of HomeControlAPIService (for use in FastAPI)"""
-    with homecontrol_api_db.connect() as conn:
-        yield HomeControlAPIService(conn, base_service, request.app.state.scheduler)
+async def get_homecontrol_base_service(
+    api_service: APIService,
+) -> HomeControlBaseService:
+    """Returns the base service of the current request's HomeControlAPIService"""
+    return api_service.base_service
 
 
-# APIService from homecontrol-api
-APIService = Annotated[HomeControlAPIService, Depends(get_homecontrol_api_service)]
+# BaseService from homecontrol-base
+BaseService = Annotated[HomeControlBaseService, Depends(get_homecontrol_base_service)]
 
 
 # --------------------- DEPENDENCIES FOR AUTHENTICATION ---------------------
@@ -71,14 +77,14 @@ async def verify_current_user_session(
 ) -> User:
     """Returns the current user session (while also ensuring they are
     authenticated)"""
-    return api_service.auth.authenticate_user_session(access_token=access_token)
+    return await api_service.auth.authenticate_user_session(access_token=access_token)
 
 
 async def verify_current_user(
     api_service: APIService, access_token: AccessToken
 ) -> User:
     """Returns the current user (while also ensuring they are authenticated)"""
-    return api_service.auth.authenticate_user(access_token=access_token)
+    return await api_service.auth.authenticate_user(access_token=access_token)
 
 
 def _create_user_dep(valid_account_type: UserAccountType):
@@ -1,12 +1,33 @@
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter
+from typing import Optional, Union
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from homecontrol_api.exceptions import InvalidParametersError
 from homecontrol_api.routers.dependencies import AnyUser, APIService
-from homecontrol_api.temperature.schemas import HistoricTemperature, Temperature
+from homecontrol_api.temperature.export import (
+    EXPORT_MEDIA_TYPES,
+    stream_historic_temperatures,
+)
+from homecontrol_api.temperature.schemas import (
+    BucketedTemperature,
+    ColumnarTemperatures,
+    HistoricTemperature,
+    HistoricTemperatureFormat,
+    HistoricTemperaturePage,
+    Temperature,
+    TemperatureAggregate,
+    TemperatureBucket,
+    TemperatureGrid,
+    TemperatureGridMethod,
+    TemperatureStatistics,
+)
 
 temperature = APIRouter(prefix="/temperature", tags=["temperature"])
 
+# Number of temperatures in a page when a cursor is given without a limit
+DEFAULT_HISTORIC_PAGE_SIZE = 1000
+
 
 @temperature.get("/outdoor")
 async def get_outdoor_temperature(
@@ -29,9 +50,119 @@ async def get_historic_temperatures(
     room_name: Optional[str] = None,
     start_timestamp: Optional[datetime] = None,
     end_timestamp: Optional[datetime] = None,
-) -> list[HistoricTemperature]:
-    return api_service.db_conn.temperatures.get_all(
+    format: HistoricTemperatureFormat = HistoricTemperatureFormat.JSON,
+    bucket: Optional[TemperatureBucket] = None,
+    agg: TemperatureAggregate = TemperatureAggregate.AVG,
+    limit: Optional[int] = Query(default=None, gt=0, le=10000),
+    cursor: Optional[str] = None,
+    delta: bool = False,
+    max_points: Optional[int] = Query(default=None, ge=3),
+) -> Union[
+    list[HistoricTemperature],
+    list[BucketedTemperature],
+    HistoricTemperaturePage,
+    ColumnarTemperatures,
+]:
+    # Return a page (with a cursor for the next) only when asked for one
+    paged = limit is not None or cursor is not None
+    if paged and limit is None:
+        limit = DEFAULT_HISTORIC_PAGE_SIZE
+
+    # Stream large exports rather than loading everything into memory
+    if format in EXPORT_MEDIA_TYPES:
+        if bucket is not None or paged or max_points is not None:
+            raise InvalidParametersError(
+                "Bucketing, paging and downsampling are not supported with the "
+                f"'{format}' format"
+            )
+        return StreamingResponse(
+            stream_historic_temperatures(
+                export_format=format,
+                room_name=room_name,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+            ),
+            media_type=EXPORT_MEDIA_TYPES[format],
+        )
+
+    if paged and (bucket is not None or max_points is not None):
+        raise InvalidParametersError(
+            "Paging is not supported when bucketing or downsampling"
+        )
+
+    if format == HistoricTemperatureFormat.COLUMNAR:
+        # Returned directly to avoid validating it again
+        return JSONResponse(
+            await api_service.temperature.get_historic_temperatures_columnar(
+                room_name=room_name,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                bucket=bucket,
+                aggregate=agg,
+                delta=delta,
+                max_points=max_points,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+
+    if paged:
+        return await api_service.temperature.get_historic_temperatures_page(
+            limit=limit,
+            cursor=cursor,
+            room_name=room_name,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+        )
+
+    return await api_service.temperature.get_historic_temperatures(
         room_name=room_name,
         start_timestamp=start_timestamp,
         end_timestamp=end_timestamp,
+        bucket=bucket,
+        aggregate=agg,
+        max_points=max_points,
+    )
+
+
+@temperature.get("/grid")
+async def get_temperature_grid(
+    user: AnyUser,
+    api_service: APIService,
+    start_timestamp: datetime,
+    end_timestamp: datetime,
+    room_names: list[str] = Query(min_length=1),
+    step: int = Query(gt=0),
+    method: TemperatureGridMethod = TemperatureGridMethod.INTERPOLATE,
+) -> TemperatureGrid:
+    # Returned directly to avoid validating it again
+    return JSONResponse(
+        await api_service.temperature.get_temperature_grid(
+            room_names=room_names,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            step=step,
+            method=method,
+        )
+    )
+
+
+@temperature.get("/statistics")
+async def get_temperature_statistics(
+    user: AnyUser,
+    api_service: APIService,
+    room_names: Optional[list[str]] = Query(default=None),
+    start_timestamp: Optional[datetime] = None,
+    end_timestamp: Optional[datetime] = None,
+    percentiles: list[float] = Query(default=[5, 25, 50, 75, 95]),
+    base_temperature: float = 15.5,
+    utc_offset: int = Query(default=0, ge=-720, le=840),
+) -> TemperatureStatistics:
+    return await api_service.temperature.get_temperature_statistics(
+        room_names=room_names,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+        percentiles=percentiles,
+        base_temperature=base_temperature,
+        utc_offset=utc_offset,
     )
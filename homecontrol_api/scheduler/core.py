@@ -3,9 +3,9 @@ from typing import Any, Optional
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger as APCronTrigger
-from homecontrol_base.database.core import DatabaseConfig
 from sqlalchemy_utils import create_database, database_exists
 
+from homecontrol_api.config.database import get_database_config
 from homecontrol_api.scheduler.schemas import JobPost, Trigger, TriggerType
 
 
@@ -13,19 +13,13 @@ class Scheduler:
     """Handles an APScheduler instance for the API"""
 
     def __init__(self):
-        database_config = DatabaseConfig()
-
         # Create database if it doesn't exist in case not using sqlite
-        url = database_config.get_url("apscheduler")
+        url = get_database_config().get_url("apscheduler")
         if not database_exists(url):
             create_database(url)
 
         self._scheduler = AsyncIOScheduler(
-            jobstores={
-                "default": SQLAlchemyJobStore(
-                    url=database_config.get_url("apscheduler")
-                )
-            }
+            jobstores={"default": SQLAlchemyJobStore(url=url)}
         )
 
     def start(self):
@@ -56,6 +56,7 @@ class TaskType(StrEnum):
 
     RECORD_ALL_TEMPERATURES = "record_all_temperature"
     EXECUTE_ROOM_ACTION = "execute_room_action"
+    PURGE_OLD_TEMPERATURES = "purge_old_temperatures"
 
 
 class TaskRecordAllTemperatures(BaseModel):
@@ -70,8 +71,19 @@ class TaskExecuteRoomAction(BaseModel):
     action_id: str
 
 
+class TaskPurgeOldTemperatures(BaseModel):
+    task_type: Literal[TaskType.PURGE_OLD_TEMPERATURES] = (
+        TaskType.PURGE_OLD_TEMPERATURES
+    )
+    # Number of days of raw temperatures to keep (the hourly/daily rollups
+    # are kept regardless)
+    retain_days: int = Field(gt=0)
+    # Maximum number of temperatures deleted in a single statement
+    batch_size: int = Field(default=1000, gt=0)
+
+
 Task = Annotated[
-    Union[TaskRecordAllTemperatures, TaskExecuteRoomAction],
+    Union[TaskRecordAllTemperatures, TaskExecuteRoomAction, TaskPurgeOldTemperatures],
     Field(discriminator="task_type"),
 ]
 
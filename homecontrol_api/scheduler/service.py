@@ -23,7 +23,7 @@ class SchedulerService(BaseService[HomeControlAPIDatabaseConnection]):
 
         self._scheduler = scheduler
 
-    def create_job(self, job_info: JobPost) -> Job:
+    async def create_job(self, job_info: JobPost) -> Job:
         """Creates a Job
 
         Args:
@@ -44,22 +44,24 @@ class SchedulerService(BaseService[HomeControlAPIDatabaseConnection]):
         )
 
         # Add to the database (only once successfully added to APScheduler)
-        job = self.db_conn.jobs.create(job)
+        job = await self.db_conn.jobs.create(job)
 
         # Return the created job
         return Job.model_validate(job)
 
-    def get_jobs(self) -> list[Job]:
+    async def get_jobs(self) -> list[Job]:
         """Returns a list of all Jobs"""
 
-        return TypeAdapter(list[Job]).validate_python(self.db_conn.jobs.get_all())
+        return TypeAdapter(list[Job]).validate_python(
+            await self.db_conn.jobs.get_all()
+        )
 
-    def get_job(self, job_id: str) -> Job:
+    async def get_job(self, job_id: str) -> Job:
         """Returns a Job given its id"""
 
-        return Job.model_validate(self.db_conn.jobs.get(job_id))
+        return Job.model_validate(await self.db_conn.jobs.get(job_id))
 
-    def update_job(self, job_id: str, job_data: JobPatch) -> Job:
+    async def update_job(self, job_id: str, job_data: JobPatch) -> Job:
         """Updates a job
 
         Args:
@@ -68,7 +70,7 @@ class SchedulerService(BaseService[HomeControlAPIDatabaseConnection]):
         """
 
         # Obtain the Job
-        job = self.db_conn.jobs.get(job_id)
+        job = await self.db_conn.jobs.get(job_id)
         update_data = job_data.model_dump(exclude_unset=True)
 
         if not self._scheduler.has_job(job_id):
@@ -105,10 +107,10 @@ class SchedulerService(BaseService[HomeControlAPIDatabaseConnection]):
             setattr(job, key, value)
 
         # Update and return the updated data
-        self.db_conn.jobs.update(job)
+        await self.db_conn.jobs.update(job)
         return Job.model_validate(job)
 
-    def delete_job(self, job_id: str) -> None:
+    async def delete_job(self, job_id: str) -> None:
         """Deletes a Job
 
         Args:
@@ -121,4 +123,4 @@ class SchedulerService(BaseService[HomeControlAPIDatabaseConnection]):
             self._scheduler.remove_job(job_id)
         except JobLookupError:
             pass
-        self.db_conn.jobs.delete(job_id)
+        await self.db_conn.jobs.delete(job_id)
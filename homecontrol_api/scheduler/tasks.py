@@ -1,18 +1,32 @@
+import logging
+
+from homecontrol_api.database.core import count_statements
 from homecontrol_api.scheduler.schemas import (
+    Job,
     TaskExecuteRoomAction,
+    TaskPurgeOldTemperatures,
     TaskRecordAllTemperatures,
 )
 
+logger = logging.getLogger(__name__)
+
 
 async def task_handler(job_id: str):
     from homecontrol_api.service.homecontrol_api import create_homecontrol_api_service
 
-    with create_homecontrol_api_service() as service:
-        # Obtain the task that needs to be executed
-        task = service.scheduler.get_job(job_id).task
+    with count_statements() as counter:
+        async with create_homecontrol_api_service() as service:
+            # Obtain the task that needs to be executed (read directly rather than
+            # via the scheduler service as that would create a whole new Scheduler)
+            task = Job.model_validate(await service.db_conn.jobs.get(job_id)).task
 
-        # Execute the task
-        if isinstance(task, TaskRecordAllTemperatures):
-            await service.temperature.record_all_temperatures_to_db()
-        elif isinstance(task, TaskExecuteRoomAction):
-            await service.action.execute_room_action(task.action_id)
+            # Execute the task
+            if isinstance(task, TaskRecordAllTemperatures):
+                await service.temperature.record_all_temperatures_to_db()
+            elif isinstance(task, TaskExecuteRoomAction):
+                await service.action.execute_room_action(task.action_id)
+            elif isinstance(task, TaskPurgeOldTemperatures):
+                await service.temperature.purge_old_temperatures(
+                    retain_days=task.retain_days, batch_size=task.batch_size
+                )
+    logger.debug("Job '%s' executed %d database statements", job_id, counter.count)
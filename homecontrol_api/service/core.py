@@ -1,18 +1,30 @@
-from typing import Generic
+from typing import Callable, Generic
 
-from homecontrol_base.database.core import TDatabaseConnection
 from homecontrol_base.service.homecontrol_base import HomeControlBaseService
 
+from homecontrol_api.database.core import TAsyncDatabaseConnection
 
-class BaseAPIService(Generic[TDatabaseConnection]):
+
+class BaseAPIService(Generic[TAsyncDatabaseConnection]):
     """Used for handling a database connection over a longer period of time
-    e.g. during a REST API endpoint execution"""
+    e.g. during a REST API endpoint execution
+
+    The base service is only obtained when first used, so that e.g. requests
+    that only need the database don't open it.
+    """
 
-    db_conn: TDatabaseConnection
-    base_service: HomeControlBaseService
+    db_conn: TAsyncDatabaseConnection
+    _get_base_service: Callable[[], HomeControlBaseService]
 
     def __init__(
-        self, db_conn: TDatabaseConnection, base_service: HomeControlBaseService
+        self,
+        db_conn: TAsyncDatabaseConnection,
+        get_base_service: Callable[[], HomeControlBaseService],
     ) -> None:
         self.db_conn = db_conn
-        self.base_service = base_service
+        self._get_base_service = get_base_service
+
+    @property
+    def base_service(self) -> HomeControlBaseService:
+        """Returns the base service (opening it if this is the first use)"""
+        return self._get_base_service()
@@ -1,5 +1,6 @@
-from contextlib import contextmanager
-from typing import Generator, Optional
+from contextlib import ExitStack, asynccontextmanager, nullcontext
+from functools import partial
+from typing import AsyncGenerator, Callable, ContextManager, Optional
 
 from homecontrol_base.service.homecontrol_base import (
     HomeControlBaseService,
@@ -8,21 +9,32 @@ from homecontrol_base.service.homecontrol_base import (
 from homecontrol_api.actions.service import ActionService
 
 from homecontrol_api.authentication.service import AuthService
-from homecontrol_api.config.api import APIConfig
+from homecontrol_api.config.api import APIConfig, get_api_config
 from homecontrol_api.database.database import HomeControlAPIDatabaseConnection
 from homecontrol_api.database.database import database as homecontrol_api_db
 from homecontrol_api.rooms.service import RoomService
 from homecontrol_api.scheduler.core import Scheduler
 from homecontrol_api.scheduler.service import SchedulerService
-from homecontrol_api.service.core import BaseAPIService
 from homecontrol_api.temperature.service import TemperatureService
 
+# Returns a context manager giving a base service
+BaseServiceFactory = Callable[[], ContextManager[HomeControlBaseService]]
 
-class HomeControlAPIService(BaseAPIService[HomeControlAPIDatabaseConnection]):
-    """Service for homecontrol_api"""
+
+class HomeControlAPIService:
+    """Service for homecontrol_api
+
+    The database connection and base service are only opened when first used
+    so that e.g. requests that only need to talk to devices don't open a
+    database connection.
+    """
 
     _api_config: APIConfig
     _scheduler: Scheduler
+    _base_service_factory: BaseServiceFactory
+    _exit_stack: ExitStack
+    _db_conn: Optional[HomeControlAPIDatabaseConnection] = None
+    _base_service: Optional[HomeControlBaseService] = None
     _auth: Optional[AuthService] = None
     _room: Optional[RoomService] = None
     _temperature: Optional[TemperatureService] = None
@@ -31,15 +43,63 @@ class HomeControlAPIService(BaseAPIService[HomeControlAPIDatabaseConnection]):
 
     def __init__(
         self,
-        db_conn: HomeControlAPIDatabaseConnection,
-        base_service: HomeControlBaseService,
+        base_service_factory: BaseServiceFactory,
         scheduler: Optional[Scheduler],
     ) -> None:
-        """When the scheduler is None will automatically create only if needed"""
-        super().__init__(db_conn, base_service)
+        """When the scheduler is None will automatically create only if needed
 
-        self._api_config = APIConfig()
+        Args:
+            base_service_factory (BaseServiceFactory): Used to obtain the base
+                                                       service when first
+                                                       needed
+            scheduler (Optional[Scheduler]): Scheduler to use
+        """
+        self._api_config = get_api_config()
         self._scheduler = scheduler
+        self._base_service_factory = base_service_factory
+        self._exit_stack = ExitStack()
+
+    @property
+    def db_conn(self) -> HomeControlAPIDatabaseConnection:
+        """Returns a connection to the homecontrol-api database, opening it
+        on first use"""
+        if not self._db_conn:
+            self._db_conn = homecontrol_api_db.create_connection()
+        return self._db_conn
+
+    def get_base_service(self) -> HomeControlBaseService:
+        """Returns the base service, opening it on first use (passed to sub
+        services so they only open it when they need it)"""
+        if not self._base_service:
+            self._base_service = self._exit_stack.enter_context(
+                self._base_service_factory()
+            )
+        return self._base_service
+
+    @property
+    def base_service(self) -> HomeControlBaseService:
+        """Returns the base service, opening it on first use"""
+        return self.get_base_service()
+
+    async def commit(self):
+        """Commits all changes made to the database (if it was opened)"""
+        if self._db_conn:
+            await self._db_conn.commit()
+
+    async def rollback(self):
+        """Discards all uncommitted changes made to the database (if it was
+        opened)"""
+        if self._db_conn:
+            await self._db_conn.rollback()
+
+    async def close(self):
+        """Closes the database connection and base service (if they were
+        opened)"""
+        try:
+            if self._db_conn:
+                await self._db_conn.close()
+        finally:
+            self._exit_stack.close()
 
     # Below are properties that create the sub services when required
 
@@ -62,7 +122,7 @@ class HomeControlAPIService(BaseAPIService[HomeControlAPIDatabaseConnection]):
         """Returns a TemperatureService while caching it"""
         if not self._temperature:
             self._temperature = TemperatureService(
-                self.db_conn, self.base_service, self.room
+                self.db_conn, self.get_base_service, self.room, self._api_config
             )
         return self._temperature
 
@@ -79,19 +139,42 @@ class HomeControlAPIService(BaseAPIService[HomeControlAPIDatabaseConnection]):
     def action(self) -> ActionService:
         """Returns a ActionService while caching it"""
         if not self._action:
-            self._action = ActionService(self.db_conn, self.base_service)
+            self._action = ActionService(self.db_conn, self.get_base_service)
         return self._action
 
 
-@contextmanager
-def create_homecontrol_api_service(
+@asynccontextmanager
+async def create_homecontrol_api_service(
     base_service: Optional[HomeControlBaseService] = None,
     scheduler: Optional[Scheduler] = None,
-) -> Generator[HomeControlAPIService, None, None]:
-    """Creates an instance of HomeControlAPIService (for use in scripts)"""
-    with homecontrol_api_db.connect() as conn:
-        if base_service:
-            yield HomeControlAPIService(conn, base_service, scheduler)
-        else:
-            with create_homecontrol_base_service() as new_base_service:
-                yield HomeControlAPIService(conn, new_base_service, scheduler)
+    base_service_factory: Optional[BaseServiceFactory] = None,
+) -> AsyncGenerator[HomeControlAPIService, None]:
+    """Creates an instance of HomeControlAPIService
+
+    Args:
+        base_service (Optional[HomeControlBaseService]): Existing base service
+                                                         to use
+        scheduler (Optional[Scheduler]): Scheduler to use (created if needed
+                                         when not given)
+        base_service_factory (Optional[BaseServiceFactory]): Used to obtain
+            the base service when first needed if one isn't given (defaults
+            to create_homecontrol_base_service)
+
+    Changes to the database are committed once when done, or rolled back if
+    an exception is raised.
+    """
+    if base_service:
+        base_service_factory = partial(nullcontext, base_service)
+    elif base_service_factory is None:
+        base_service_factory = create_homecontrol_base_service
+
+    service = HomeControlAPIService(base_service_factory, scheduler)
+    try:
+        try:
+            yield service
+        except BaseException:
+            await service.rollback()
+            raise
+        await service.commit()
+    finally:
+        await service.close()
@@ -0,0 +1,352 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncGenerator, NamedTuple, Optional, Union
+
+import numpy as np
+
+from homecontrol_api.config.api import APIConfigTemperatureData
+from homecontrol_api.database.database import database as homecontrol_api_db
+from homecontrol_api.database.temperatures import (
+    EPOCH,
+    TemperaturesDBConnection,
+    get_naive_utc,
+)
+
+logger = logging.getLogger(__name__)
+
+MICROSECOND = timedelta(microseconds=1)
+
+
+class BufferedTemperature(NamedTuple):
+    """Temperature returned from the buffer (with the same fields as a row
+    returned by TemperaturesDBConnection.get_all)"""
+
+    id: int
+    timestamp: datetime
+    value: float
+    room_name: str
+
+
+def _to_microseconds(timestamp: datetime) -> int:
+    """Returns a timestamp as a number of microseconds since the epoch"""
+    return (get_naive_utc(timestamp) - EPOCH) // MICROSECOND
+
+
+class _RoomBuffer:
+    """Fixed size ring of the most recent temperatures of a single room
+    (ordered by timestamp)"""
+
+    def __init__(self, capacity: int) -> None:
+        self.ids = np.empty(capacity, dtype=np.int64)
+        # Microseconds since the epoch
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float32)
+        self.start = 0
+        self.size = 0
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        """Returns the used part of one of the arrays from oldest to newest"""
+        end = self.start + self.size
+        if end <= len(array):
+            return array[self.start : end]
+        return np.concatenate((array[self.start :], array[: end - len(array)]))
+
+    def last_timestamp(self) -> Optional[int]:
+        """Returns the timestamp of the newest temperature (if any)"""
+        if self.size == 0:
+            return None
+        return int(self.timestamps[(self.start + self.size - 1) % len(self.ids)])
+
+    def append(
+        self, temperature_id: int, timestamp: int, value: float
+    ) -> Optional[int]:
+        """Adds a temperature newer than all the others
+
+        Returns:
+            Optional[int]: Timestamp of the temperature removed to make space
+                           (if the buffer was full)
+        """
+        evicted = None
+        index = (self.start + self.size) % len(self.ids)
+        if self.size == len(self.ids):
+            evicted = int(self.timestamps[self.start])
+            self.start = (self.start + 1) % len(self.ids)
+        else:
+            self.size += 1
+        self.ids[index] = temperature_id
+        self.timestamps[index] = timestamp
+        self.values[index] = value
+        return evicted
+
+    def drop_before(self, timestamp: int) -> None:
+        """Removes temperatures older than a timestamp"""
+        count = int(np.searchsorted(self._ordered(self.timestamps), timestamp))
+        self.start = (self.start + count) % len(self.ids)
+        self.size -= count
+
+    def select(
+        self, start: Optional[int], end: Optional[int]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the ids, timestamps and values of the temperatures between
+        two timestamps (start inclusive, end exclusive)"""
+        timestamps = self._ordered(self.timestamps)
+        first = 0 if start is None else np.searchsorted(timestamps, start)
+        last = len(timestamps)
+        if end is not None:
+            last = np.searchsorted(timestamps, end)
+        return (
+            self._ordered(self.ids)[first:last],
+            timestamps[first:last],
+            self._ordered(self.values)[first:last],
+        )
+
+
+class TemperatureBuffer:
+    """In-memory buffer of the most recently recorded temperatures of each
+    room, used to serve queries for recent temperatures without the database
+
+    The buffer is loaded from the database on startup and then added to
+    whenever temperatures are recorded, so it is only complete while all
+    temperatures are recorded by this process. Queries are only served when
+    they start after the time the buffer covers from (which moves forward as
+    old temperatures are dropped).
+    """
+
+    _config: APIConfigTemperatureData
+    _rooms: dict[str, _RoomBuffer]
+    # Microseconds since the epoch from which all temperatures are in the
+    # buffer (None until loaded)
+    _covered_from: Optional[int]
+
+    hits: int
+    misses: int
+
+    def __init__(self, config: APIConfigTemperatureData) -> None:
+        self._config = config
+        self._rooms = {}
+        self._covered_from = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether temperatures should be kept in memory"""
+        return self._config.buffer_hours > 0 and self._config.buffer_capacity > 0
+
+    def _get_cutoff(self, now: datetime) -> int:
+        """Returns the timestamp before which temperatures should be dropped"""
+        return _to_microseconds(now - timedelta(hours=self._config.buffer_hours))
+
+    def _cover_from(self, timestamp: int) -> None:
+        """Moves forward the time the buffer covers from"""
+        self._covered_from = max(self._covered_from, timestamp)
+
+    def _drop_before(self, timestamp: int) -> None:
+        """Drops temperatures older than a timestamp from every room"""
+        for room in self._rooms.values():
+            room.drop_before(timestamp)
+        self._cover_from(timestamp)
+
+    async def load(self) -> int:
+        """Replaces the contents of the buffer with the most recent
+        temperatures in the database
+
+        Returns:
+            int: Number of temperatures loaded
+        """
+        if not self.enabled:
+            return 0
+
+        start_time = time.perf_counter()
+        now = datetime.utcnow()
+        async with homecontrol_api_db.connect() as conn:
+            rows = await conn.temperatures.get_all(
+                start_timestamp=now - timedelta(hours=self._config.buffer_hours)
+            )
+
+        self._rooms = {}
+        self._covered_from = self._get_cutoff(now)
+        self.add(rows, now)
+        logger.info(
+            "Loaded %d temperatures into memory in %.3fs",
+            len(rows),
+            time.perf_counter() - start_time,
+        )
+        return len(rows)
+
+    def add(self, temperatures: list[Any], now: Optional[datetime] = None) -> None:
+        """Adds recorded temperatures to the buffer (ignored until loaded)
+
+        Args:
+            temperatures (list[Any]): Temperatures ordered by timestamp, each
+                                      with an id, timestamp, value and
+                                      room_name
+            now (Optional[datetime]): Current time used to drop old
+                                      temperatures (defaults to now)
+        """
+        if self._covered_from is None:
+            return
+
+        for temperature in temperatures:
+            room = self._rooms.get(temperature.room_name)
+            if room is None:
+                room = _RoomBuffer(self._config.buffer_capacity)
+                self._rooms[temperature.room_name] = room
+
+            timestamp = _to_microseconds(temperature.timestamp)
+            last_timestamp = room.last_timestamp()
+            if last_timestamp is not None and timestamp < last_timestamp:
+                # Can't be kept in order, so stop covering the time it was
+                # recorded at instead
+                room.drop_before(last_timestamp + 1)
+                self._cover_from(last_timestamp + 1)
+                continue
+
+            evicted = room.append(temperature.id, timestamp, temperature.value)
+            if evicted is not None:
+                self._cover_from(evicted + 1)
+
+        self._drop_before(
+            self._get_cutoff(now if now is not None else datetime.utcnow())
+        )
+
+    def drop_before(self, timestamp: datetime) -> None:
+        """Drops temperatures recorded before a time (e.g. as they have been
+        deleted from the database)"""
+        if self._covered_from is not None:
+            self._drop_before(_to_microseconds(timestamp))
+
+    def get_all(
+        self,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        room_names: Optional[list[str]] = None,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[list[BufferedTemperature]]:
+        """Returns temperatures from the buffer if it covers the whole query
+        (counting the hit or miss)
+
+        Args:
+            room_name (Optional[str]): Name of the room to return
+            start_timestamp (Optional[datetime]): Time to return from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to return up to
+                                                (exclusive)
+            room_names (Optional[list[str]]): Names of the rooms to return
+            after (Optional[tuple[datetime, int]]): Only return temperatures
+                after the one with this timestamp and id
+            limit (Optional[int]): Maximum number of temperatures to return
+
+        Returns:
+            Optional[list[BufferedTemperature]]: The temperatures ordered by
+                timestamp (then id), or None if they must be obtained from
+                the database instead
+        """
+        if not self.enabled:
+            return None
+
+        start = None
+        if start_timestamp is not None:
+            start = _to_microseconds(start_timestamp)
+        if self._covered_from is None or start is None or start < self._covered_from:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        end = None
+        if end_timestamp is not None:
+            end = _to_microseconds(end_timestamp)
+        if room_name is not None:
+            room_names = [room_name]
+        elif room_names is None:
+            room_names = list(self._rooms)
+        room_names = [
+            name for name in dict.fromkeys(room_names) if name in self._rooms
+        ]
+        if not room_names:
+            return []
+
+        selected = [self._rooms[name].select(start, end) for name in room_names]
+        ids, timestamps, values = (np.concatenate(arrays) for arrays in zip(*selected))
+        names = np.repeat(room_names, [len(room_ids) for room_ids, _, _ in selected])
+
+        order = np.lexsort((ids, timestamps))
+        if after is not None:
+            after_timestamp = _to_microseconds(after[0])
+            sorted_timestamps = timestamps[order]
+            order = order[
+                (sorted_timestamps > after_timestamp)
+                | ((sorted_timestamps == after_timestamp) & (ids[order] > after[1]))
+            ]
+        if limit is not None:
+            order = order[:limit]
+        return [
+            BufferedTemperature(*temperature)
+            for temperature in zip(
+                ids[order].tolist(),
+                timestamps[order].astype("datetime64[us]").tolist(),
+                # Via the shortest string representing each float32 so values
+                # are returned as they were recorded
+                values[order].astype(str).astype(np.float64).tolist(),
+                names[order].tolist(),
+            )
+        ]
+
+    async def stream_all(
+        self,
+        conn: TemperaturesDBConnection,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        chunk_size: int = 1000,
+        room_names: Optional[list[str]] = None,
+    ) -> AsyncGenerator[Union[list[BufferedTemperature], list[Any]], None]:
+        """Returns the same temperatures as TemperaturesDBConnection.stream_all,
+        but from the buffer when it covers the whole query (see get_all)
+
+        Args:
+            conn (TemperaturesDBConnection): Used to stream the temperatures
+                                             from the database otherwise
+
+        Yields:
+            Union[list[BufferedTemperature], list[Any]]: Next chunk of at most
+                chunk_size temperatures
+        """
+        query = {
+            "room_name": room_name,
+            "start_timestamp": start_timestamp,
+            "end_timestamp": end_timestamp,
+            "room_names": room_names,
+        }
+        temperatures = self.get_all(**query)
+        if temperatures is None:
+            async for rows in conn.stream_all(**query, chunk_size=chunk_size):
+                yield rows
+            return
+
+        for start in range(0, len(temperatures), chunk_size):
+            yield temperatures[start : start + chunk_size]
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the number of queries served from the buffer (hits) and
+        from the database (misses)"""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_temperature_buffer = TemperatureBuffer(APIConfigTemperatureData())
+
+
+def configure_temperature_buffer(config: APIConfigTemperatureData) -> None:
+    """Replaces the temperature buffer used by this process with an empty one
+    using the given config"""
+    global _temperature_buffer
+
+    _temperature_buffer = TemperatureBuffer(config)
+
+
+def get_temperature_buffer() -> TemperatureBuffer:
+    """Returns the temperature buffer used by this process"""
+    return _temperature_buffer
@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+from sqlalchemy import Row
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Returns the indices of the points to keep when downsampling a series
+    using Largest-Triangle-Three-Buckets (keeping its visual shape)
+
+    The first and last points are always kept. The remaining points are split
+    into max_points - 2 buckets, and from each the point forming the largest
+    triangle with the previously kept point and the average of the next
+    bucket is kept.
+
+    Args:
+        x (np.ndarray): Increasing x coordinates of the points
+        y (np.ndarray): y coordinates of the points
+        max_points (int): Maximum number of points to keep (at least 3)
+
+    Returns:
+        np.ndarray: Indices of the points to keep in increasing order
+    """
+    num_points = len(x)
+    if num_points <= max_points:
+        return np.arange(num_points)
+
+    # Bucket i covers the points edges[i] to edges[i + 1] (exclusive)
+    edges = np.linspace(1, num_points - 1, max_points - 1).astype(np.int64)
+
+    # Average of each bucket (found using cumulative sums), followed by the
+    # last point which acts as the bucket after the final one
+    x_sums = np.concatenate(([0], np.cumsum(x)))
+    y_sums = np.concatenate(([0], np.cumsum(y)))
+    sizes = edges[1:] - edges[:-1]
+    x_averages = (x_sums[edges[1:]] - x_sums[edges[:-1]]) / sizes
+    y_averages = (y_sums[edges[1:]] - y_sums[edges[:-1]]) / sizes
+    next_x = np.append(x_averages[1:], x[-1])
+    next_y = np.append(y_averages[1:], y[-1])
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = num_points - 1
+
+    # Each bucket depends on the point kept from the previous one, so only the
+    # areas within a bucket can be computed together
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        areas = np.abs(
+            (x[previous] - next_x[i]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[i] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
+
+
+def get_epoch_seconds(timestamps: Sequence) -> np.ndarray:
+    """Returns timestamps (either datetimes or seconds since the epoch) as an
+    array of seconds since the epoch"""
+    if timestamps and isinstance(timestamps[0], datetime):
+        return (
+            np.array(timestamps, dtype="datetime64[us]").astype(np.int64) / 1e6
+        )
+    return np.array(timestamps, dtype=np.float64)
+
+
+def downsample_temperatures(rows: list[Row], max_points: int) -> list[Row]:
+    """Downsamples the temperatures of each room separately using LTTB
+
+    Args:
+        rows (list[Row]): Temperatures ordered by timestamp, each with at
+                          least a timestamp, value and room_name
+        max_points (int): Maximum number of temperatures to keep per room (at
+                          least 3)
+
+    Returns:
+        list[Row]: The kept temperatures (still ordered by timestamp)
+    """
+    positions_by_room: dict[str, list[int]] = {}
+    for position, row in enumerate(rows):
+        positions_by_room.setdefault(row.room_name, []).append(position)
+    if all(len(positions) <= max_points for positions in positions_by_room.values()):
+        return rows
+
+    timestamps = get_epoch_seconds([row.timestamp for row in rows])
+    values = np.array([row.value for row in rows], dtype=np.float64)
+
+    kept = []
+    for positions in positions_by_room.values():
+        positions = np.array(positions)
+        kept.append(
+            positions[lttb(timestamps[positions], values[positions], max_points)]
+        )
+    return [rows[position] for position in np.sort(np.concatenate(kept))]
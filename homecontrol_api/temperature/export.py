@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy import Row
+
+from homecontrol_api.database.database import database as homecontrol_api_db
+from homecontrol_api.temperature.buffer import get_temperature_buffer
+from homecontrol_api.temperature.schemas import HistoricTemperatureFormat
+
+# Number of rows fetched from the database at once while streaming
+EXPORT_CHUNK_SIZE = 1000
+
+# Media types of the streamed formats
+EXPORT_MEDIA_TYPES = {
+    HistoricTemperatureFormat.NDJSON: "application/x-ndjson",
+    HistoricTemperatureFormat.CSV: "text/csv",
+}
+
+# Columns of each exported temperature
+EXPORT_COLUMNS = ["id", "timestamp", "value", "room_name"]
+
+
+def _format_ndjson(rows: list[Row]) -> str:
+    """Returns a chunk of rows as NDJSON (one object per line)"""
+    return "".join(
+        json.dumps(
+            {
+                "id": row.id,
+                "timestamp": row.timestamp.isoformat(),
+                "value": row.value,
+                "room_name": row.room_name,
+            }
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def _format_csv(rows: list[Row]) -> str:
+    """Returns a chunk of rows as CSV lines"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (row.id, row.timestamp.isoformat(), row.value, row.room_name)
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_historic_temperatures(
+    export_format: HistoricTemperatureFormat,
+    room_name: Optional[str] = None,
+    start_timestamp: Optional[datetime] = None,
+    end_timestamp: Optional[datetime] = None,
+) -> AsyncGenerator[str, None]:
+    """Streams historic temperatures in a given format a chunk at a time
+
+    This opens its own database connection, as the response body is only
+    sent after the request's own connection has been closed.
+
+    Args:
+        export_format (HistoricTemperatureFormat): Format to return (must be
+                                                   a streamed one)
+        room_name (Optional[str]): Name of the room to export
+        start_timestamp (Optional[datetime]): Time to export from (inclusive)
+        end_timestamp (Optional[datetime]): Time to export up to (exclusive)
+
+    Yields:
+        str: Next chunk of the exported data
+    """
+    if export_format == HistoricTemperatureFormat.CSV:
+        format_rows = _format_csv
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    else:
+        format_rows = _format_ndjson
+
+    async with homecontrol_api_db.connect() as conn:
+        # Recent temperatures may be in memory
+        async for rows in get_temperature_buffer().stream_all(
+            conn.temperatures,
+            room_name=room_name,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            chunk_size=EXPORT_CHUNK_SIZE,
+        ):
+            yield format_rows(rows)
@@ -0,0 +1,89 @@
+import math
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Row
+
+from homecontrol_api.temperature.downsampling import get_epoch_seconds
+from homecontrol_api.temperature.schemas import TemperatureGridMethod
+
+# Smallest step in seconds for which grids are resampled from temperatures
+# bucketed in the database (one bucket per step) rather than every recorded
+# temperature
+MIN_BUCKETED_GRID_STEP = 60
+
+
+def resample(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    grid: np.ndarray,
+    method: TemperatureGridMethod,
+) -> np.ndarray:
+    """Returns the values of a series at each point of a grid
+
+    Args:
+        timestamps (np.ndarray): Increasing timestamps of the series
+        values (np.ndarray): Values of the series
+        grid (np.ndarray): Timestamps to find the values at
+        method (TemperatureGridMethod): How to find values between those of
+                                        the series
+
+    Returns:
+        np.ndarray: Value at each point of the grid (NaN where there is
+                    nothing to resample from)
+    """
+    if len(timestamps) == 0:
+        return np.full(len(grid), np.nan)
+    if method == TemperatureGridMethod.INTERPOLATE:
+        return np.interp(grid, timestamps, values, left=np.nan, right=np.nan)
+
+    # Index of the last value at or before each point
+    indices = np.searchsorted(timestamps, grid, side="right") - 1
+    return np.where(indices >= 0, values[np.maximum(indices, 0)], np.nan)
+
+
+def resample_temperatures(
+    rows: list[Row],
+    room_names: list[str],
+    grid: np.ndarray,
+    method: TemperatureGridMethod,
+    timestamp_offset: float = 0,
+) -> dict[str, Any]:
+    """Resamples the temperatures of each room onto a shared grid (see
+    TemperatureGrid)
+
+    Args:
+        rows (list[Row]): Temperatures of all the rooms ordered by timestamp,
+                          each with at least a timestamp, value and room_name
+        room_names (list[str]): Names of the rooms to return (in order)
+        grid (np.ndarray): Seconds since the epoch of each point in the grid
+        method (TemperatureGridMethod): How to find values between recorded
+                                        temperatures
+        timestamp_offset (float): Seconds to add to the timestamp of each
+                                  temperature (e.g. to place bucketed
+                                  temperatures within their bucket)
+
+    Returns:
+        dict[str, Any]: The grid as a plain dict
+    """
+    room_names_array = np.array([row.room_name for row in rows], dtype=object)
+    timestamps = get_epoch_seconds([row.timestamp for row in rows]) + timestamp_offset
+    values = np.array([row.value for row in rows], dtype=np.float64)
+
+    rooms = []
+    for room_name in room_names:
+        mask = room_names_array == room_name
+        resampled = resample(timestamps[mask], values[mask], grid, method)
+        rooms.append(
+            {
+                "room_name": room_name,
+                "values": [
+                    None if math.isnan(value) else value
+                    for value in resampled.tolist()
+                ],
+            }
+        )
+    return {
+        "timestamps": np.round(grid * 1000).astype(np.int64).tolist(),
+        "rooms": rooms,
+    }
@@ -1,10 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime
+from enum import StrEnum
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
-from homecontrol_api.core.types import StringUUID
-
 
 class Temperature(BaseModel):
     value: Optional[float]
@@ -13,7 +12,144 @@ class Temperature(BaseModel):
 class HistoricTemperature(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-    id: StringUUID
+    id: int
+    timestamp: datetime
+    value: float
+    room_name: str
+
+
+class HistoricTemperaturePage(BaseModel):
+    temperatures: list[HistoricTemperature]
+    # Cursor to pass to obtain the next page (None when there are no more)
+    next_cursor: Optional[str]
+
+
+class HistoricTemperatureFormat(StrEnum):
+    """Enum of formats historic temperatures can be returned in"""
+
+    # Single JSON array
+    JSON = "json"
+    # JSON object per line (streamed)
+    NDJSON = "ndjson"
+    # CSV with a header row (streamed)
+    CSV = "csv"
+    # Arrays of timestamps and values per room (see ColumnarTemperatures)
+    COLUMNAR = "columnar"
+
+
+class TemperatureBucket(StrEnum):
+    """Enum of intervals historic temperatures can be grouped into"""
+
+    MINUTE = "1m"
+    FIVE_MINUTES = "5m"
+    HOUR = "1h"
+    DAY = "1d"
+
+    @property
+    def seconds(self) -> int:
+        """Length of the interval in seconds"""
+        return {
+            TemperatureBucket.MINUTE: 60,
+            TemperatureBucket.FIVE_MINUTES: 300,
+            TemperatureBucket.HOUR: 3600,
+            TemperatureBucket.DAY: 86400,
+        }[self]
+
+
+class TemperatureAggregate(StrEnum):
+    """Enum of ways temperatures in a bucket can be combined"""
+
+    AVG = "avg"
+    MIN = "min"
+    MAX = "max"
+    # Most recent temperature in the bucket
+    LAST = "last"
+
+
+class BucketedTemperature(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    # Start of the bucket
     timestamp: datetime
     value: float
     room_name: str
+
+
+class ColumnarRoomTemperatures(BaseModel):
+    room_name: str
+    # Milliseconds since the epoch of each temperature (when delta encoded,
+    # all but the first are instead the difference from the previous one)
+    timestamps: list[int]
+    values: list[float]
+
+
+class ColumnarTemperatures(BaseModel):
+    # Whether the timestamps are delta encoded
+    delta: bool
+    rooms: list[ColumnarRoomTemperatures]
+    # Cursor to pass to obtain the next page (None when there are no more or
+    # the temperatures aren't paged)
+    next_cursor: Optional[str] = None
+
+
+class TemperatureGridMethod(StrEnum):
+    """Enum of ways temperatures can be resampled onto a time grid"""
+
+    # Linearly interpolate between the temperatures either side
+    INTERPOLATE = "interpolate"
+    # Use the most recent temperature
+    FFILL = "ffill"
+
+
+class TemperatureGridRoom(BaseModel):
+    room_name: str
+    # Temperature at each timestamp of the grid (None when there is no
+    # temperature to resample from)
+    values: list[Optional[float]]
+
+
+class TemperatureGrid(BaseModel):
+    # Milliseconds since the epoch of each point in the grid
+    timestamps: list[int]
+    rooms: list[TemperatureGridRoom]
+
+
+class DailyTemperatureStatistics(BaseModel):
+    date: date
+    min: float
+    max: float
+    mean: float
+    # Degrees the mean temperature was below/above the base temperature
+    heating_degree_days: float
+    cooling_degree_days: float
+
+
+class RoomTemperatureStatistics(BaseModel):
+    room_name: str
+    # Number of temperatures the statistics are computed from
+    count: int
+    min: float
+    max: float
+    mean: float
+    # Value of each requested percentile (keyed by the percentile)
+    percentiles: dict[str, float]
+    # Totals over all the days
+    heating_degree_days: float
+    cooling_degree_days: float
+    daily: list[DailyTemperatureStatistics]
+    # Mean temperature in each hour of the day (inner lists) for each day of
+    # the week (outer list, starting on Monday), None where there are none
+    heatmap: list[list[Optional[float]]]
+
+
+class TemperatureStatistics(BaseModel):
+    # Base temperature used for the degree days
+    base_temperature: float
+    # Offset from UTC in minutes used to split days and hours
+    utc_offset: int
+    rooms: list[RoomTemperatureStatistics]
+    # Time of the earliest temperature included (None when there are none)
+    raw_from: Optional[datetime] = None
+    # Whether older temperatures in the requested range have been purged
+    # (leaving only their rollups) so aren't included in the statistics
+    truncated: bool = False
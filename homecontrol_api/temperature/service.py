@@ -1,13 +1,77 @@
-from datetime import datetime
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Optional, Union
 
+import numpy as np
 from homecontrol_base.service.homecontrol_base import HomeControlBaseService
+from sqlalchemy import Row
 
+from homecontrol_api.config.api import APIConfig
 from homecontrol_api.database.database import HomeControlAPIDatabaseConnection
-from homecontrol_api.database.models import TemperatureInDB
+from homecontrol_api.database.database import database as homecontrol_api_db
+from homecontrol_api.database.temperatures import EPOCH, get_naive_utc
+from homecontrol_api.devices.aircon.schemas import ACDeviceState
+from homecontrol_api.temperature.downsampling import downsample_temperatures
+from homecontrol_api.exceptions import InvalidParametersError
+from homecontrol_api.temperature.grid import (
+    MIN_BUCKETED_GRID_STEP,
+    resample_temperatures,
+)
+from homecontrol_api.temperature.statistics import (
+    STATISTICS_CHUNK_SIZE,
+    compute_temperature_statistics_async,
+    get_temperature_arrays,
+)
 from homecontrol_api.rooms.schemas import ControlType, Room
 from homecontrol_api.rooms.service import RoomService
 from homecontrol_api.service.core import BaseAPIService
-from homecontrol_api.temperature.schemas import Temperature
+from homecontrol_api.temperature.buffer import (
+    BufferedTemperature,
+    get_temperature_buffer,
+)
+from homecontrol_api.temperature.schemas import (
+    BucketedTemperature,
+    HistoricTemperature,
+    HistoricTemperaturePage,
+    Temperature,
+    TemperatureAggregate,
+    TemperatureBucket,
+    TemperatureGridMethod,
+    TemperatureStatistics,
+)
+
+logger = logging.getLogger(__name__)
+
+MILLISECOND = timedelta(milliseconds=1)
+
+
+def encode_historic_temperature_cursor(timestamp: datetime, temperature_id: int) -> str:
+    """Returns an opaque cursor identifying the position after a temperature
+    (when ordered by timestamp then id)"""
+    return base64.urlsafe_b64encode(
+        json.dumps([timestamp.isoformat(), temperature_id]).encode()
+    ).decode()
+
+
+def decode_historic_temperature_cursor(cursor: str) -> tuple[datetime, int]:
+    """Returns the timestamp and id of the temperature a cursor was created
+    from
+
+    Raises:
+        InvalidParametersError: If the cursor is invalid
+    """
+    try:
+        timestamp, temperature_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(timestamp), int(temperature_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise InvalidParametersError(f"Invalid cursor '{cursor}'") from exc
 
 
 class TemperatureService(BaseAPIService[HomeControlAPIDatabaseConnection]):
@@ -16,47 +80,463 @@ class TemperatureService(BaseAPIService[HomeControlAPIDatabaseConnection]):
     def __init__(
         self,
         db_conn: HomeControlAPIDatabaseConnection,
-        base_service: HomeControlBaseService,
+        get_base_service: Callable[[], HomeControlBaseService],
         room_service: RoomService,
+        api_config: APIConfig,
     ) -> None:
-        super().__init__(db_conn, base_service)
+        super().__init__(db_conn, get_base_service)
 
         self._room_service = room_service
+        self._api_config = api_config
+        self._buffer = get_temperature_buffer()
 
-    async def get_outdoor_temperature(self) -> Temperature:
-        """Obtains the outdoor temperature (Based on the first available AC unit)"""
+    def _get_outdoor_device_id(self) -> Optional[str]:
+        """Returns the ID of the AC unit used for the outdoor temperature (the
+        first available one)"""
         ac_device_infos = self.base_service.db_conn.ac_devices.get_all()
         if len(ac_device_infos) == 0:
-            return Temperature(value=None)
-        ac_device = await self.base_service.aircon.get_device(
-            str(ac_device_infos[0].id)
-        )
-        ac_state = await ac_device.get_state()
-        return Temperature(value=ac_state.outdoor_temperature)
-
-    async def _get_room_temperature(self, room: Room) -> Temperature:
-        """Returns the temperature of a Room (based on available AC units)"""
+            return None
+        return str(ac_device_infos[0].id)
 
-        # Find any AC device
-        ac_device_id = None
+    def _get_room_device_id(self, room: Room) -> Optional[str]:
+        """Returns the ID of the AC unit used for a room's temperature (the
+        first one in the room)"""
         for controller in room.controllers:
             if controller.control_type == ControlType.AC:
-                ac_device_id = controller.id
-                break
+                return controller.id
+        return None
+
+    async def _get_ac_state(self, device_id: str) -> ACDeviceState:
+        """Returns the current state of an AC unit"""
+        ac_device = await self.base_service.aircon.get_device(device_id)
+        return await ac_device.get_state()
 
-        # Fetch the value
+    async def _get_ac_state_for_recording(
+        self, device_id: str
+    ) -> Optional[ACDeviceState]:
+        """Returns the current state of an AC unit, or None if it fails or
+        takes longer than the configured timeout (so that one unit can't hold
+        up or prevent recording the others)"""
+        try:
+            return await asyncio.wait_for(
+                self._get_ac_state(device_id),
+                timeout=self._api_config.temperature.device_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Timed out getting the state of AC device '%s' to record", device_id
+            )
+        except Exception:
+            logger.exception(
+                "Failed to get the state of AC device '%s' to record", device_id
+            )
+        return None
+
+    async def get_outdoor_temperature(self) -> Temperature:
+        """Obtains the outdoor temperature (Based on the first available AC unit)"""
+        ac_device_id = self._get_outdoor_device_id()
         if ac_device_id is None:
             return Temperature(value=None)
+        ac_state = await self._get_ac_state(ac_device_id)
+        return Temperature(value=ac_state.outdoor_temperature)
 
-        ac_device = await self.base_service.aircon.get_device(ac_device_id)
-        ac_state = await ac_device.get_state()
+    async def _get_room_temperature(self, room: Room) -> Temperature:
+        """Returns the temperature of a Room (based on available AC units)"""
+        ac_device_id = self._get_room_device_id(room)
+        if ac_device_id is None:
+            return Temperature(value=None)
+        ac_state = await self._get_ac_state(ac_device_id)
         return Temperature(value=ac_state.indoor_temperature)
 
     async def get_room_temperature(self, room_id: str) -> Temperature:
         """Returns the temperature of a Room (based on available AC units)"""
 
         return await self._get_room_temperature(
-            room=self._room_service.get_room(room_id=room_id)
+            room=await self._room_service.get_room(room_id=room_id)
+        )
+
+    async def _get_historic_rows(
+        self,
+        room_name: Optional[str],
+        start_timestamp: Optional[datetime],
+        end_timestamp: Optional[datetime],
+        bucket: Optional[TemperatureBucket],
+        aggregate: TemperatureAggregate,
+        max_points: Optional[int],
+    ) -> list[Row]:
+        """Returns the rows of recorded temperatures (optionally bucketed
+        and/or downsampled)"""
+        rows = None
+        # Recent temperatures may be in memory (bucketed ones are already
+        # read from the rollups where possible)
+        if bucket is None:
+            rows = self._buffer.get_all(
+                room_name=room_name,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+            )
+        if rows is None:
+            rows = await self.db_conn.temperatures.get_all(
+                room_name=room_name,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                bucket_size=bucket.seconds if bucket is not None else None,
+                aggregate=aggregate,
+            )
+        if max_points is not None:
+            rows = await asyncio.to_thread(downsample_temperatures, rows, max_points)
+        return rows
+
+    async def get_historic_temperatures(
+        self,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        bucket: Optional[TemperatureBucket] = None,
+        aggregate: TemperatureAggregate = TemperatureAggregate.AVG,
+        max_points: Optional[int] = None,
+    ) -> Union[list[HistoricTemperature], list[BucketedTemperature]]:
+        """Returns recorded temperatures
+
+        Args:
+            room_name (Optional[str]): Name of the room to return
+            start_timestamp (Optional[datetime]): Time to return from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to return up to
+                                                (exclusive)
+            bucket (Optional[TemperatureBucket]): When given, temperatures of
+                                                  each room are combined over
+                                                  intervals of this length
+            aggregate (TemperatureAggregate): How to combine the temperatures
+                                              in each bucket
+            max_points (Optional[int]): When given, each room's temperatures
+                                        are downsampled to at most this many
+                                        (keeping the shape of the series)
+        """
+        rows = await self._get_historic_rows(
+            room_name, start_timestamp, end_timestamp, bucket, aggregate, max_points
+        )
+
+        if bucket is None:
+            return [HistoricTemperature.model_validate(row) for row in rows]
+        return [
+            BucketedTemperature(
+                timestamp=datetime.utcfromtimestamp(row.timestamp),
+                value=row.value,
+                room_name=row.room_name,
+            )
+            for row in rows
+        ]
+
+    async def get_historic_temperatures_columnar(
+        self,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        bucket: Optional[TemperatureBucket] = None,
+        aggregate: TemperatureAggregate = TemperatureAggregate.AVG,
+        delta: bool = False,
+        max_points: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Returns recorded temperatures as arrays of timestamps and values
+        per room (see ColumnarTemperatures)
+
+        This is built directly from the rows rather than validating a model
+        for each temperature, so the result is only a plain dict.
+
+        Args:
+            room_name (Optional[str]): Name of the room to return
+            start_timestamp (Optional[datetime]): Time to return from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to return up to
+                                                (exclusive)
+            bucket (Optional[TemperatureBucket]): When given, temperatures of
+                                                  each room are combined over
+                                                  intervals of this length
+            aggregate (TemperatureAggregate): How to combine the temperatures
+                                              in each bucket
+            delta (bool): Whether to delta encode the timestamps
+            max_points (Optional[int]): When given, each room's temperatures
+                                        are downsampled to at most this many
+                                        (keeping the shape of the series)
+            limit (Optional[int]): When given, only a page of at most this
+                                   many temperatures is returned (not
+                                   supported with bucket or max_points)
+            cursor (Optional[str]): next_cursor of the previous page
+
+        Raises:
+            InvalidParametersError: If the cursor is invalid
+        """
+        next_cursor = None
+        if limit is not None:
+            rows, next_cursor = await self._get_historic_page_rows(
+                limit, cursor, room_name, start_timestamp, end_timestamp
+            )
+        else:
+            rows = await self._get_historic_rows(
+                room_name, start_timestamp, end_timestamp, bucket, aggregate, max_points
+            )
+
+        rooms: dict[str, dict[str, Any]] = {}
+        previous_timestamps: dict[str, int] = {}
+        for row in rows:
+            # Bucketed rows already give seconds since the epoch
+            if bucket is None:
+                timestamp = (row.timestamp - EPOCH) // MILLISECOND
+            else:
+                timestamp = row.timestamp * 1000
+
+            room = rooms.get(row.room_name)
+            if room is None:
+                room = {"room_name": row.room_name, "timestamps": [], "values": []}
+                rooms[row.room_name] = room
+            if delta:
+                previous_timestamp = previous_timestamps.get(row.room_name, 0)
+                previous_timestamps[row.room_name] = timestamp
+                timestamp -= previous_timestamp
+            room["timestamps"].append(timestamp)
+            room["values"].append(row.value)
+
+        return {
+            "delta": delta,
+            "rooms": list(rooms.values()),
+            "next_cursor": next_cursor,
+        }
+
+    async def _get_historic_page_rows(
+        self,
+        limit: int,
+        cursor: Optional[str],
+        room_name: Optional[str],
+        start_timestamp: Optional[datetime],
+        end_timestamp: Optional[datetime],
+    ) -> tuple[list[Row], Optional[str]]:
+        """Returns the rows of a page of recorded temperatures along with the
+        cursor for the next page (None when there are no more)
+
+        Raises:
+            InvalidParametersError: If the cursor is invalid
+        """
+        # Fetch an extra temperature to find whether there is another page
+        query = {
+            "room_name": room_name,
+            "start_timestamp": start_timestamp,
+            "end_timestamp": end_timestamp,
+            "after": (
+                decode_historic_temperature_cursor(cursor)
+                if cursor is not None
+                else None
+            ),
+            "limit": limit + 1,
+        }
+        rows = self._buffer.get_all(**query)
+        if rows is None:
+            rows = await self.db_conn.temperatures.get_all(**query)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_historic_temperature_cursor(
+                rows[-1].timestamp, rows[-1].id
+            )
+        return rows, next_cursor
+
+    async def get_historic_temperatures_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        room_name: Optional[str] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+    ) -> HistoricTemperaturePage:
+        """Returns a page of recorded temperatures (each page is found using
+        the position of the last temperature of the previous one, so is as
+        fast to obtain as the first)
+
+        Args:
+            limit (int): Maximum number of temperatures to return
+            cursor (Optional[str]): next_cursor of the previous page
+            room_name (Optional[str]): Name of the room to return
+            start_timestamp (Optional[datetime]): Time to return from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to return up to
+                                                (exclusive)
+
+        Raises:
+            InvalidParametersError: If the cursor is invalid
+        """
+        rows, next_cursor = await self._get_historic_page_rows(
+            limit, cursor, room_name, start_timestamp, end_timestamp
+        )
+        return HistoricTemperaturePage(
+            temperatures=[HistoricTemperature.model_validate(row) for row in rows],
+            next_cursor=next_cursor,
+        )
+
+    async def get_temperature_grid(
+        self,
+        room_names: list[str],
+        start_timestamp: datetime,
+        end_timestamp: datetime,
+        step: int,
+        method: TemperatureGridMethod = TemperatureGridMethod.INTERPOLATE,
+    ) -> dict[str, Any]:
+        """Returns the temperatures of several rooms resampled onto a shared
+        time axis (see TemperatureGrid)
+
+        The temperatures of all the rooms are obtained using a single query
+        and the result is only a plain dict. For steps of at least
+        MIN_BUCKETED_GRID_STEP, temperatures are bucketed in the database with
+        one bucket per step, so the number read is bounded by the number of
+        points in the grid rather than the number recorded.
+
+        Args:
+            room_names (list[str]): Names of the rooms to return
+            start_timestamp (datetime): Time of the first point in the grid
+            end_timestamp (datetime): Time to end the grid before (exclusive)
+            step (int): Time in seconds between each point in the grid
+            method (TemperatureGridMethod): How to find values between
+                                            recorded temperatures
+
+        Raises:
+            InvalidParametersError: If the grid would be empty or have too
+                                    many points
+        """
+        start_timestamp = get_naive_utc(start_timestamp)
+        end_timestamp = get_naive_utc(end_timestamp)
+        start = (start_timestamp - EPOCH).total_seconds()
+        end = (end_timestamp - EPOCH).total_seconds()
+        num_points = math.ceil((end - start) / step)
+        if num_points <= 0:
+            raise InvalidParametersError(
+                "The end timestamp must be after the start timestamp"
+            )
+        max_points = self._api_config.temperature.max_grid_points
+        if num_points > max_points:
+            raise InvalidParametersError(
+                f"The grid would have {num_points} points, but at most "
+                f"{max_points} are allowed"
+            )
+
+        bucketed = step >= MIN_BUCKETED_GRID_STEP
+        # Include temperatures either side so the first and last points have
+        # some to resample from (buckets are aligned to the epoch rather than
+        # the grid, so may start up to a step before it)
+        margin = timedelta(seconds=step * (2 if bucketed else 1))
+        query = {
+            "room_names": room_names,
+            "start_timestamp": start_timestamp - margin,
+            "end_timestamp": end_timestamp + margin,
+        }
+        if bucketed:
+            if method == TemperatureGridMethod.INTERPOLATE:
+                # Place the mean of each bucket at its middle
+                aggregate, timestamp_offset = TemperatureAggregate.AVG, step / 2
+            else:
+                # Place the last temperature of each bucket at its end, so it
+                # isn't used before it could have been recorded
+                aggregate, timestamp_offset = TemperatureAggregate.LAST, step
+            rows = await self.db_conn.temperatures.get_all(
+                **query, bucket_size=step, aggregate=aggregate
+            )
+        else:
+            timestamp_offset = 0
+            rows = self._buffer.get_all(**query)
+            if rows is None:
+                rows = await self.db_conn.temperatures.get_all(**query)
+        return await asyncio.to_thread(
+            resample_temperatures,
+            rows,
+            list(dict.fromkeys(room_names)),
+            start + np.arange(num_points) * step,
+            method,
+            timestamp_offset,
+        )
+
+    async def get_temperature_statistics(
+        self,
+        room_names: Optional[list[str]] = None,
+        start_timestamp: Optional[datetime] = None,
+        end_timestamp: Optional[datetime] = None,
+        percentiles: Optional[list[float]] = None,
+        base_temperature: float = 15.5,
+        utc_offset: int = 0,
+    ) -> TemperatureStatistics:
+        """Returns statistics about the recorded temperatures of each room
+
+        The temperatures are read in chunks (each converted to arrays on a
+        thread) and the statistics are computed on a worker process, so large
+        ranges don't block the event loop. Only the raw temperatures are
+        used, so the response gives the time they start from and whether
+        older ones in the range have been purged.
+
+        Args:
+            room_names (Optional[list[str]]): Names of the rooms to return
+                                              (all when not given)
+            start_timestamp (Optional[datetime]): Time to include from
+                                                  (inclusive)
+            end_timestamp (Optional[datetime]): Time to include up to
+                                                (exclusive)
+            percentiles (Optional[list[float]]): Percentiles to find (between
+                                                 0 and 100)
+            base_temperature (float): Base temperature for degree days
+            utc_offset (int): Offset from UTC in minutes of the time zone
+                              used to split days and hours
+
+        Raises:
+            InvalidParametersError: If a percentile is out of range
+        """
+        if percentiles is None:
+            percentiles = []
+        if any(not 0 <= percentile <= 100 for percentile in percentiles):
+            raise InvalidParametersError("Percentiles must be between 0 and 100")
+
+        # Store only arrays (rather than rows) while reading
+        room_indices: dict[str, int] = {}
+        timestamps, values, indices = [], [], []
+        raw_from = None
+        async for rows in self._buffer.stream_all(
+            self.db_conn.temperatures,
+            room_names=room_names,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            chunk_size=STATISTICS_CHUNK_SIZE,
+        ):
+            if raw_from is None and rows:
+                raw_from = rows[0].timestamp
+            chunk_timestamps, chunk_values, chunk_indices = await asyncio.to_thread(
+                get_temperature_arrays, rows, room_indices
+            )
+            timestamps.append(chunk_timestamps)
+            values.append(chunk_values)
+            indices.append(chunk_indices)
+
+        # The rollup of the hour of the earliest temperature starts at most
+        # an hour before it, so any earlier ones are from purged temperatures
+        earliest_rollup = (
+            await self.db_conn.temperatures.get_earliest_rollup_timestamp(
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                room_names=room_names,
+            )
+        )
+        truncated = earliest_rollup is not None and (
+            raw_from is None or earliest_rollup + timedelta(hours=1) <= raw_from
+        )
+
+        statistics = await compute_temperature_statistics_async(
+            list(room_indices),
+            np.concatenate(timestamps) if timestamps else np.empty(0),
+            np.concatenate(values) if values else np.empty(0),
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+            percentiles,
+            base_temperature,
+            utc_offset,
+        )
+        return TemperatureStatistics.model_validate(
+            {**statistics, "raw_from": raw_from, "truncated": truncated}
         )
 
     async def record_all_temperatures_to_db(self):
@@ -66,25 +546,118 @@ class TemperatureService(BaseAPIService[HomeControlAPIDatabaseConnection]):
         # but comparison is better this way)
         current_timestamp = datetime.utcnow()
 
-        outdoor_temp = (await self.get_outdoor_temperature()).value
+        # Find the devices needed, so each is only asked for its state once
+        # even if e.g. the outdoor temperature comes from a room's AC unit
+        outdoor_device_id = self._get_outdoor_device_id()
+        room_device_ids = [
+            (room.name, self._get_room_device_id(room))
+            for room in await self._room_service.get_rooms()
+        ]
+        device_ids = list(
+            {outdoor_device_id, *[device_id for _, device_id in room_device_ids]}
+            - {None}
+        )
 
-        if outdoor_temp is not None:
-            self.db_conn.temperatures.create(
-                TemperatureInDB(
-                    timestamp=current_timestamp,
-                    value=outdoor_temp,
-                    room_name="outdoor",
-                )
+        # Read all devices at once
+        states = dict(
+            zip(
+                device_ids,
+                await asyncio.gather(
+                    *[
+                        self._get_ac_state_for_recording(device_id)
+                        for device_id in device_ids
+                    ]
+                ),
+            )
+        )
+
+        temperatures = []
+
+        outdoor_state = states.get(outdoor_device_id)
+        if outdoor_state and outdoor_state.outdoor_temperature is not None:
+            temperatures.append(
+                {
+                    "timestamp": current_timestamp,
+                    "value": outdoor_state.outdoor_temperature,
+                    "room_name": "outdoor",
+                }
             )
 
         # Now for each room
-        for room in self._room_service.get_rooms():
-            temp = (await self._get_room_temperature(room=room)).value
-            if temp is not None:
-                self.db_conn.temperatures.create(
-                    TemperatureInDB(
-                        timestamp=current_timestamp,
-                        value=temp,
-                        room_name=room.name,
+        for room_name, device_id in room_device_ids:
+            room_state = states.get(device_id)
+            if room_state and room_state.indoor_temperature is not None:
+                temperatures.append(
+                    {
+                        "timestamp": current_timestamp,
+                        "value": room_state.indoor_temperature,
+                        "room_name": room_name,
+                    }
+                )
+
+        # Write the whole sample at once
+        temperature_ids = await self.db_conn.temperatures.create_many(temperatures)
+
+        # Only keep them in memory once they can be read from the database
+        self.db_conn.after_commit(
+            partial(
+                self._buffer.add,
+                [
+                    BufferedTemperature(id=temperature_id, **temperature)
+                    for temperature_id, temperature in zip(
+                        temperature_ids, temperatures
                     )
+                ],
+                now=current_timestamp,
+            )
+        )
+
+    async def purge_old_temperatures(self, retain_days: int, batch_size: int) -> int:
+        """Deletes recorded temperatures older than a number of days in
+        batches, leaving only the rollups for that period (nothing is deleted
+        if the rollups don't include all of those temperatures)
+
+        Each batch is deleted and committed using a connection of its own,
+        so this is independent of the rest of this service's unit of work.
+
+        Args:
+            retain_days (int): Number of days of temperatures to keep
+            batch_size (int): Maximum number of temperatures to delete at once
+
+        Returns:
+            int: Number of temperatures deleted
+        """
+        start_time = time.perf_counter()
+        cutoff = datetime.utcnow() - timedelta(days=retain_days)
+
+        # Only the rollups are kept, so they must include everything deleted
+        uncovered = await self.db_conn.temperatures.count_uncovered_rollups(cutoff)
+        if uncovered > 0:
+            logger.error(
+                "Not purging temperatures recorded before %s as %d rollups "
+                "don't include them yet (rebuild the rollups of the remaining "
+                "temperatures with scripts/backfill_temperature_rollups.py, "
+                "which keeps those of already purged ones)",
+                cutoff.isoformat(),
+                uncovered,
+            )
+            return 0
+        self._buffer.drop_before(cutoff)
+
+        total_deleted = 0
+        while True:
+            async with homecontrol_api_db.connect() as conn:
+                rows_deleted = await conn.temperatures.delete_before(
+                    cutoff, limit=batch_size
                 )
+            total_deleted += rows_deleted
+            if rows_deleted < batch_size:
+                break
+
+        logger.info(
+            "Purged %d temperatures recorded before %s in %.3fs",
+            total_deleted,
+            cutoff.isoformat(),
+            time.perf_counter() - start_time,
+        )
+        return total_deleted
@@ -0,0 +1,221 @@
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import Row
+
+# Number of worker processes used when not configured
+DEFAULT_STATISTICS_WORKERS = 1
+
+# Number of temperatures read from the database at a time
+STATISTICS_CHUNK_SIZE = 10000
+
+# Day of the week of the epoch (a Thursday, where Monday is 0)
+EPOCH_WEEKDAY = 3
+
+
+def _to_list(array: np.ndarray) -> list[Optional[float]]:
+    """Returns an array as a list (with None in place of NaN)"""
+    return [None if math.isnan(value) else value for value in array.tolist()]
+
+
+def get_temperature_arrays(
+    rows: list[Row], room_indices: dict[str, int]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns a chunk of temperatures as the arrays taken by
+    compute_temperature_statistics
+
+    Args:
+        rows (list[Row]): Temperatures, each with an id, timestamp, value and
+                          room_name
+        room_indices (dict[str, int]): Index of each room seen so far (any new
+                                       rooms are added)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Seconds since the epoch,
+            value and room index of each temperature
+    """
+    if not rows:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+
+    _, timestamps, values, room_names = zip(*rows)
+    chunk_room_names, chunk_room_indices = np.unique(
+        np.array(room_names, dtype=object), return_inverse=True
+    )
+    chunk_to_room_indices = np.array(
+        [
+            room_indices.setdefault(room_name, len(room_indices))
+            for room_name in chunk_room_names.tolist()
+        ],
+        dtype=np.int64,
+    )
+    return (
+        np.array(timestamps, dtype="datetime64[us]").astype(np.int64) / 1e6,
+        np.array(values, dtype=np.float64),
+        chunk_to_room_indices[chunk_room_indices.reshape(-1)],
+    )
+
+
+def compute_temperature_statistics(
+    room_names: list[str],
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    room_indices: np.ndarray,
+    percentiles: list[float],
+    base_temperature: float,
+    utc_offset: int,
+) -> dict[str, Any]:
+    """Returns statistics about the temperatures of each room (see
+    TemperatureStatistics)
+
+    Degree days are found from the mean temperature of each day.
+
+    Args:
+        room_names (list[str]): Names of the rooms the temperatures belong to
+        timestamps (np.ndarray): Seconds since the epoch of each temperature
+                                 (in increasing order)
+        values (np.ndarray): Value of each temperature
+        room_indices (np.ndarray): Index into room_names of the room of each
+                                   temperature
+        percentiles (list[float]): Percentiles to find (between 0 and 100)
+        base_temperature (float): Base temperature for degree days
+        utc_offset (int): Offset from UTC in minutes of the time zone used to
+                          split days and hours
+
+    Returns:
+        dict[str, Any]: The statistics as a plain dict (omitting rooms with
+                        no temperatures)
+    """
+    local_timestamps = timestamps + utc_offset * 60
+    days = np.floor_divide(local_timestamps, 86400).astype(np.int64)
+    hours = np.floor_divide(local_timestamps, 3600).astype(np.int64) % 24
+    cells = ((days + EPOCH_WEEKDAY) % 7) * 24 + hours
+
+    rooms = []
+    for room_index, room_name in enumerate(room_names):
+        mask = room_indices == room_index
+        room_values = values[mask]
+        if len(room_values) == 0:
+            continue
+        room_days = days[mask]
+
+        # Temperatures are in order, so each day is a contiguous run
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(room_days)) + 1))
+        counts = np.diff(np.append(starts, len(room_days)))
+        means = np.add.reduceat(room_values, starts) / counts
+        heating_degree_days = np.maximum(base_temperature - means, 0)
+        cooling_degree_days = np.maximum(means - base_temperature, 0)
+
+        # Mean of each hour of each day of the week
+        cell_counts = np.bincount(cells[mask], minlength=7 * 24)
+        cell_totals = np.bincount(cells[mask], weights=room_values, minlength=7 * 24)
+        with np.errstate(invalid="ignore"):
+            heatmap = (cell_totals / cell_counts).reshape(7, 24)
+
+        rooms.append(
+            {
+                "room_name": room_name,
+                "count": len(room_values),
+                "min": float(room_values.min()),
+                "max": float(room_values.max()),
+                "mean": float(room_values.mean()),
+                "percentiles": dict(
+                    zip(
+                        [f"{percentile:g}" for percentile in percentiles],
+                        np.percentile(room_values, percentiles).tolist(),
+                    )
+                ),
+                "heating_degree_days": float(heating_degree_days.sum()),
+                "cooling_degree_days": float(cooling_degree_days.sum()),
+                "daily": [
+                    {
+                        "date": date,
+                        "min": min_value,
+                        "max": max_value,
+                        "mean": mean,
+                        "heating_degree_days": heating,
+                        "cooling_degree_days": cooling,
+                    }
+                    for date, min_value, max_value, mean, heating, cooling in zip(
+                        room_days[starts].astype("datetime64[D]").astype(str).tolist(),
+                        np.minimum.reduceat(room_values, starts).tolist(),
+                        np.maximum.reduceat(room_values, starts).tolist(),
+                        means.tolist(),
+                        heating_degree_days.tolist(),
+                        cooling_degree_days.tolist(),
+                    )
+                ],
+                "heatmap": [_to_list(weekday) for weekday in heatmap],
+            }
+        )
+
+    return {
+        "base_temperature": base_temperature,
+        "utc_offset": utc_offset,
+        "rooms": rooms,
+    }
+
+
+_statistics_executor: Optional[ProcessPoolExecutor] = None
+
+
+def configure_temperature_statistics(max_workers: int) -> None:
+    """Sets the number of worker processes temperature statistics are
+    computed on by compute_temperature_statistics_async
+
+    Args:
+        max_workers (int): Maximum number of worker processes
+    """
+    global _statistics_executor
+
+    shutdown_temperature_statistics()
+    # Spawned rather than forked, as the API process has other threads running
+    _statistics_executor = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def shutdown_temperature_statistics() -> None:
+    """Shuts down the worker processes used for computing temperature
+    statistics (if started)"""
+    global _statistics_executor
+
+    if _statistics_executor is not None:
+        _statistics_executor.shutdown(wait=False, cancel_futures=True)
+        _statistics_executor = None
+
+
+def _get_statistics_executor() -> ProcessPoolExecutor:
+    """Returns the process pool used for computing temperature statistics
+    (creating it with the default number of workers if it hasn't been
+    configured)"""
+    if _statistics_executor is None:
+        configure_temperature_statistics(DEFAULT_STATISTICS_WORKERS)
+    return _statistics_executor
+
+
+async def compute_temperature_statistics_async(
+    room_names: list[str],
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    room_indices: np.ndarray,
+    percentiles: list[float],
+    base_temperature: float,
+    utc_offset: int,
+) -> dict[str, Any]:
+    """Runs compute_temperature_statistics on a worker process, so it
+    doesn't block the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_statistics_executor(),
+        compute_temperature_statistics,
+        room_names,
+        timestamps,
+        values,
+        room_indices,
+        percentiles,
+        base_temperature,
+        utc_offset,
+    )
@@ -0,0 +1,29 @@
+"""
+Rebuilds the hourly/daily temperature rollup tables from all recorded
+temperatures
+
+The migration adding the rollups fills them from the existing temperatures,
+so this only needs to be run if they are ever suspected to be incorrect.
+
+Only the rollups from the bucket of the earliest remaining temperature
+onwards are rebuilt. Older rollups (left after purging old temperatures)
+can't be recomputed, so are kept as they are.
+"""
+
+import asyncio
+
+from homecontrol_api.database.database import database
+
+# Number of rows to read/write at a time
+CHUNK_SIZE = 10000
+
+
+async def backfill():
+    print("Rebuilding temperature rollups...")
+    async with database.connect() as conn:
+        count = await conn.temperatures.rebuild_rollups(chunk_size=CHUNK_SIZE)
+    print(f"Summarised {count} temperatures")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
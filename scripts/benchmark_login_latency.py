@@ -0,0 +1,105 @@
+"""
+Measures the latency of a (cheap) endpoint while logins are happening
+
+Run against an already running instance of homecontrol-api, e.g.
+
+    python scripts/benchmark_login_latency.py --url http://localhost:8000 \
+        --username admin --password password
+
+Latencies of the probed endpoint are reported both without and with
+concurrent logins so the effect of password hashing on other requests can be
+compared.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Returns a percentile of a list of values (nearest rank)"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def print_latencies(title: str, latencies: list[float]):
+    """Prints a summary of a list of latencies (in seconds)"""
+    print(
+        f"{title}: n={len(latencies)} "
+        f"mean={statistics.mean(latencies) * 1000:.1f}ms "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms"
+    )
+
+
+async def probe(
+    client: httpx.AsyncClient, path: str, duration: float, interval: float
+) -> list[float]:
+    """Repeatedly requests an endpoint for a given duration returning the
+    latency of each request"""
+    latencies = []
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_repeatedly(
+    client: httpx.AsyncClient, username: str, password: str, duration: float
+) -> int:
+    """Repeatedly logs in for a given duration returning the number of logins
+    performed"""
+    logins = 0
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        response = await client.post(
+            "/auth/login",
+            json={"username": username, "password": password, "long_lived": False},
+        )
+        response.raise_for_status()
+        logins += 1
+    return logins
+
+
+async def benchmark(args: argparse.Namespace):
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        print_latencies(
+            f"{args.probe_path} (idle)",
+            await probe(client, args.probe_path, args.duration, args.interval),
+        )
+
+        start = time.perf_counter()
+        latencies, *logins = await asyncio.gather(
+            probe(client, args.probe_path, args.duration, args.interval),
+            *[
+                login_repeatedly(client, args.username, args.password, args.duration)
+                for _ in range(args.concurrent_logins)
+            ],
+        )
+        elapsed = time.perf_counter() - start
+        print_latencies(
+            f"{args.probe_path} ({args.concurrent_logins} concurrent logins)",
+            latencies,
+        )
+        print(f"logins: {sum(logins)} ({sum(logins) / elapsed:.1f}/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--probe-path", default="/info")
+    parser.add_argument("--concurrent-logins", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=0.01)
+    asyncio.run(benchmark(parser.parse_args()))
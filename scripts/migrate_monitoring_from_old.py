@@ -4,12 +4,12 @@ Migrates monitoring data from homecontrol-old to homecontrol-api
 Should be able to just update ROOM_NAMES, and the local database config to point to
 database and then run
 """
+import asyncio
 import sqlite3
 from datetime import datetime
 from typing import List
 
 from homecontrol_api.database.database import database as new_database
-from homecontrol_api.database.models import TemperatureInDB
 
 # Names of the Rooms from the old version and their new counterpart
 ROOM_NAMES = [
@@ -69,7 +69,7 @@ class OldDatabaseConnection:
         self._conn.commit()
 
 
-def migrate():
+async def migrate():
     print("Migrating data...")
     # Go through each room
     for room_names in ROOM_NAMES:
@@ -84,19 +84,21 @@ def migrate():
             )
 
         # Now need to insert into new database
-        with new_database.connect() as new_conn:
+        async with new_database.connect() as new_conn:
             print("Populating new database...")
-            for singleTempData in data:
-                new_conn.temperatures.create(
-                    TemperatureInDB(
-                        timestamp=datetime.strptime(
+            await new_conn.temperatures.create_many(
+                [
+                    {
+                        "timestamp": datetime.strptime(
                             singleTempData[0], "%Y-%m-%d %H:%M:%S"
                         ),
-                        value=singleTempData[1],
-                        room_name=room_names[1],
-                    )
-                )
+                        "value": singleTempData[1],
+                        "room_name": room_names[1],
+                    }
+                    for singleTempData in data
+                ]
+            )
 
 
 if __name__ == "__main__":
-    migrate()
+    asyncio.run(migrate())